@@ -1,17 +1,26 @@
 # Walk through the root community folder and all its subfolders, finding files with the name 'contenthistory.json'.
-# Parse those files as JSON, and find the "items" field, then the "type" field inside it. If it's "Airport", note
-# the "content" field, which is going to be the airport's ICAO code.
-# Then, look for any subfolder in the root streamed packages folder that contiains that ICAO code in its name.
+# Parse those files as JSON, and find the "items" field, then the "type" field inside it. If it's one of the types in
+# CONTENT_TYPES (e.g. "Airport"), note the "content" field, which for airports is going to be the airport's ICAO code.
+# Then, look for any subfolder in the root streamed packages folder that the content type's matcher says it replaces.
 # Make sure that a subfolder with the same name exists in the root community folder. Report if there is or not.
-version = '0.5.3'
+version = '0.6.0'
 
 import argparse
-import datetime
 import json
 import os
-import shutil
+import re
 import sys
-from typing import List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from content_backup import BackupStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from install_discovery import find_install, find_installs, get_fixed_usercfg_dirs # pylint: disable=wrong-import-position
+
+# With both installed, the MS Store install's folders are autodetected, as they always have been
+AUTODETECT_VENDOR_ORDER = ["MS Store", "Steam"]
 
 def os_walk_long_path(root_path):
     list = os.listdir(root_path)
@@ -22,60 +31,134 @@ def os_walk_long_path(root_path):
         for root, dirs, files in os_walk_long_path(os.path.join(root_path, dir)):
             yield root, dirs, files
 
-def redirect_print(output_func=None):
+def null_log(message):
+    pass
+
+def long_path(path):
+    # Streamed package folder names can get long enough to run past MAX_PATH, so use extended-length paths on Windows
+    if os.name == 'nt' and not path.startswith("\\\\?\\"):
+        return u"\\\\?\\" + path.replace("/", "\\")
+    return path
+
+class ContentType:
     """
-    Helper to redirect print statements.
-    If `output_func` is provided, all print statements will call `output_func` instead of writing to stdout.
+    A kind of community content that can replace a streamed package. `item_types` are the "type" values of
+    contenthistory.json items that belong to it, and `matcher` finds the streamed package a given item's "content"
+    replaces, using the StreamedPackagesIndex built once per scan.
     """
-    class PrintRedirector:
-        def write(self, message):
-            if output_func:
-                output_func(message)
-            else:
-                sys.__stdout__.write(message)
-        def flush(self):  # Required to support file-like behavior
-            pass
+    def __init__(self, name: str, item_types: List[str], matcher: Callable[[str, 'StreamedPackagesIndex'], Optional[str]]):
+        self.name = name
+        self.item_types = item_types
+        self.matcher = matcher
 
-    sys.stdout = PrintRedirector()
-    sys.stderr = PrintRedirector()
+class StreamedPackagesIndex:
+    """
+    Lists the streamed packages folder once, and indexes the package names by every dash-separated token in them,
+    so each content type's matcher can look up its candidates instead of re-listing the folder.
+    """
+    def __init__(self, root_folder):
+        self.names = sorted(os.listdir(root_folder))
+        self.by_token = {}
+        for name in self.names:
+            for token in set(name.lower().split('-')):
+                self.by_token.setdefault(token, []).append(name)
 
-def find_airports_in_community_folder(community_root, verbose):
-    airports = {}
+    def candidates(self, token):
+        return self.by_token.get(token.lower(), [])
+
+def slugify(content):
+    return '-'.join(x for x in re.split(r'[^a-z0-9]+', content.lower()) if x)
+
+def match_airport(content, index):
+    for dir in index.candidates(content):
+        if 'landingchallenge' in dir.lower():
+            continue
+        return dir
+    return None
+
+def make_slug_matcher(category_token):
+    # Streamed landmark, city and aircraft packages are named like "<vendor>-<category>-<content name>". The content
+    # name has to match whole dash-separated tokens, like airports do, so e.g. "paris" doesn't match "parisian".
+    def match(content, index):
+        slug_tokens = slugify(content).split('-')
+        if not slug_tokens[0]:
+            return None
+        for dir in index.candidates(category_token):
+            dir_tokens = dir.lower().split('-')
+            for i in range(dir_tokens.index(category_token) + 1, len(dir_tokens) - len(slug_tokens) + 1):
+                if dir_tokens[i:i + len(slug_tokens)] == slug_tokens:
+                    return dir
+        return None
+    return match
+
+CONTENT_TYPES = [
+    ContentType('Airport', ['Airport'], match_airport),
+    ContentType('Landmark', ['Landmark'], make_slug_matcher('landmark')),
+    ContentType('City', ['City'], make_slug_matcher('city')),
+    ContentType('Aircraft', ['Aircraft'], make_slug_matcher('aircraft')),
+]
+
+def list_addons(community_root):
+    addons = []
     for addon_dirname in [x for x in os.listdir(community_root) if os.path.isdir(os.path.join(community_root, x))]:
         if '-gsx-' in addon_dirname.lower() or '-asobo-' in addon_dirname.lower() or '-microsoft-' in addon_dirname.lower() or 'navigraph-' in addon_dirname.lower():
             continue
-        addon_root = os.path.join(community_root, addon_dirname)
-        if os.path.exists(os.path.join(addon_root, 'ContentInfo')):
-            contentinfo_root = os.path.join(addon_root, 'ContentInfo')
-            contentinfo_dirs = [x for x in os.listdir(contentinfo_root) if os.path.isdir(os.path.join(contentinfo_root, x))]
-            for contentinfo_dir in contentinfo_dirs:
-                contentinfo_dir_root = os.path.join(contentinfo_root, contentinfo_dir)
-                contentinfo_dir_files = [x for x in os.listdir(contentinfo_dir_root) if os.path.isfile(os.path.join(contentinfo_dir_root, x))]
-                for file in contentinfo_dir_files:
-                    if file.lower() == 'contenthistory.json':
-                        with open(os.path.join(contentinfo_dir_root, file), 'r', encoding='utf8') as f:
-                            contentinfo = json.load(f)
-                            if 'items' in contentinfo:
-                                for item in contentinfo['items']:
-                                    if 'type' in item and item['type'] == 'Airport':
-                                        airports[item['content']] = addon_dirname
-                                        if verbose:
-                                            print(f"INFO: Found modded airport {item['content']} in {addon_dirname}")
-    return airports
+        addons.append(addon_dirname)
+    return addons
+
+# Find all items of the given content types in one add-on's ContentInfo.
+# Returns a dict of (content type name, content) -> add-on folder name.
+def find_content_in_addon(community_root, addon_dirname, content_types_by_item_type, verbose, log=None):
+    log = log or null_log
+    found = {}
+    addon_root = os.path.join(community_root, addon_dirname)
+    if os.path.exists(os.path.join(addon_root, 'ContentInfo')):
+        contentinfo_root = os.path.join(addon_root, 'ContentInfo')
+        contentinfo_dirs = [x for x in os.listdir(contentinfo_root) if os.path.isdir(os.path.join(contentinfo_root, x))]
+        for contentinfo_dir in contentinfo_dirs:
+            contentinfo_dir_root = os.path.join(contentinfo_root, contentinfo_dir)
+            contentinfo_dir_files = [x for x in os.listdir(contentinfo_dir_root) if os.path.isfile(os.path.join(contentinfo_dir_root, x))]
+            for file in contentinfo_dir_files:
+                if file.lower() == 'contenthistory.json':
+                    with open(os.path.join(contentinfo_dir_root, file), 'r', encoding='utf8') as f:
+                        contentinfo = json.load(f)
+                        if 'items' in contentinfo:
+                            for item in contentinfo['items']:
+                                content_type = content_types_by_item_type.get(item.get('type'))
+                                if content_type and 'content' in item:
+                                    found[(content_type.name, item['content'])] = addon_dirname
+                                    if verbose:
+                                        log(f"INFO: Found modded {content_type.name.lower()} {item['content']} in {addon_dirname}")
+    return found
+
+def get_content_types_by_item_type(content_types):
+    return {item_type: content_type for content_type in content_types for item_type in content_type.item_types}
+
+# Find all items of the given content types in the community folder, in a single pass over the add-ons' ContentInfo.
+# Returns a dict of (content type name, content) -> add-on folder name.
+def find_content_in_community_folder(community_root, verbose, content_types=None, log=None):
+    content_types_by_item_type = get_content_types_by_item_type(content_types or CONTENT_TYPES)
+    found = {}
+    for addon_dirname in list_addons(community_root):
+        found.update(find_content_in_addon(community_root, addon_dirname, content_types_by_item_type, verbose, log))
+    return found
+
+def find_airports_in_community_folder(community_root, verbose):
+    airports = find_content_in_community_folder(community_root, verbose, [CONTENT_TYPES[0]], print)
+    return {content: addon_dirname for (_, content), addon_dirname in airports.items()}
 
 def find_airport_in_streamed_packages_folder(root_folder, airport):
-    for dir in os.listdir(root_folder):
-        if 'landingchallenge' in dir.lower():
-            continue
-        if f'-{airport.lower()}-' in dir.lower():
-            return dir
-    return None
+    return match_airport(airport, StreamedPackagesIndex(root_folder))
 
 def get_content_xml_path(root_streamed_packages_folder):
-    paths_to_try = [
-        # Post-SU1
-        os.path.abspath(os.path.join(os.getenv('LOCALAPPDATA'), 'Packages', 'Microsoft.Limitless_8wekyb3d8bbwe', 'LocalCache', 'Content.xml')),
-        os.path.abspath(os.path.join(os.getenv('APPDATA'), 'Microsoft Flight Simulator 2024', 'Content.xml')),
+    paths_to_try = []
+    # Post-SU1, Content.xml lives next to UserCfg.opt, wherever that was found, or else in its usual folders
+    for install in find_installs(vendor_order=AUTODETECT_VENDOR_ORDER):
+        if install.sim == "2024":
+            paths_to_try.append(os.path.join(os.path.dirname(install.usercfg_path), 'Content.xml'))
+    for _, usercfg_dir in get_fixed_usercfg_dirs("2024", AUTODETECT_VENDOR_ORDER):
+        paths_to_try.append(os.path.abspath(os.path.join(usercfg_dir, 'Content.xml')))
+    paths_to_try += [
         # Pre-SU1
         os.path.abspath(os.path.join(root_streamed_packages_folder, '..', '..', 'LocalCache', 'Content.xml')),
         os.path.abspath(os.path.join(root_streamed_packages_folder, '..', 'Content.xml')),
@@ -84,70 +167,280 @@ def get_content_xml_path(root_streamed_packages_folder):
         if os.path.exists(path):
             return path
     return None
-        
 
-# For any airports in the community folder that does have a streamed package equivalent, make sure the streamed
-# package folder also exists in the community folder.
-def check_airports_in_streamed_packages_folder(root_community_folder, root_streamed_packages_folder, report_existing, verbose):
-    missing_streamed_package_overrides = {}
-    existing_streamed_package_overrides = {}
-    
-    print(f"PROGRESS: Finding airports in the community folder...")
-    airports = find_airports_in_community_folder(root_community_folder, verbose)
-    
-    print("PROGRESS: Gathering activated packages from Content.xml...")
+def read_activated_packages(content_xml_path):
+    activated_packages = []
+    with open(content_xml_path, 'r') as f:
+        lines = f.readlines()
+        for line in lines:
+            if '<Package name=' in line and 'active="Activated"' in line:
+                package_name = line.split('"')[1]
+                if not package_name.startswith("commounity"):
+                    activated_packages.append(package_name)
+    return activated_packages
+
+@dataclass
+class ScanResult:
+    """
+    The outcome of a scan. All the dicts map a streamed package folder name to the community add-on that overrides
+    its content. `cancelled` scans only have whatever was found before they were stopped.
+    """
+    root_community_folder: str
+    root_streamed_packages_folder: str
+    content_xml_path: Optional[str]
+    missing: Dict[str, str] = field(default_factory=dict)
+    existing: Dict[str, str] = field(default_factory=dict)
+    disabled: Dict[str, str] = field(default_factory=dict)
+    # (content type name, content) -> add-on, for modded content that doesn't replace any streamed package
+    unmatched: Dict[Tuple[str, str], str] = field(default_factory=dict)
+    cancelled: bool = False
+
+@dataclass
+class ScanProgress:
+    """
+    A progress update from scan_streamed_package_overrides. `total` is an estimate until the community folder has
+    been fully scanned, as the number of modded items to check is only known then. The last update of a scan has
+    `result` set, which may be a cancelled one.
+    """
+    phase: str
+    done: int
+    total: int
+    items_per_second: float
+    eta_seconds: Optional[float]
+    result: Optional[ScanResult] = None
+
+    @property
+    def cancelled(self):
+        return self.result is not None and self.result.cancelled
+
+class ProgressTracker:
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.done = 0
+        self.total = 0
+
+    def make(self, phase, **kwargs):
+        elapsed = time.monotonic() - self.start_time
+        items_per_second = self.done / elapsed if elapsed > 0 else 0.0
+        eta_seconds = (self.total - self.done) / items_per_second if items_per_second > 0 else None
+        return ScanProgress(phase, self.done, max(self.total, self.done), items_per_second, eta_seconds, **kwargs)
+
+# For any modded content (airports, landmarks, cities, aircraft) in the community folder that does have a streamed
+# package equivalent, make sure the streamed package folder also exists in the community folder.
+# This is a generator of ScanProgress updates, one per work unit (an add-on scanned, or a modded item checked). If
+# `cancel_event` gets set, the scan stops before the next work unit, and a final, cancelled result is yielded.
+# Nothing is printed, all messages go to the optional `log` callback instead, so scans can run side by side.
+def scan_streamed_package_overrides(root_community_folder, root_streamed_packages_folder, verbose, cancel_event=None, log=None):
+    log = log or null_log
     content_xml_path = get_content_xml_path(root_streamed_packages_folder)
+    result = ScanResult(root_community_folder, root_streamed_packages_folder, content_xml_path)
+    tracker = ProgressTracker()
+
+    log("PROGRESS: Finding modded content in the community folder...")
+    addons = list_addons(root_community_folder)
+    content_types_by_item_type = get_content_types_by_item_type(CONTENT_TYPES)
+    modded_content = {}
+    # One unit per add-on, plus one for reading Content.xml, plus however many modded items we'll end up checking
+    tracker.total = len(addons) + 1
+    yield tracker.make('community')
+    for addons_done, addon_dirname in enumerate(addons, start=1):
+        if cancel_event is not None and cancel_event.is_set():
+            result.cancelled = True
+            yield tracker.make('community', result=result)
+            return
+        modded_content.update(find_content_in_addon(root_community_folder, addon_dirname, content_types_by_item_type, verbose, log))
+        tracker.done += 1
+        # Extrapolate the number of modded items from the add-ons scanned so far
+        tracker.total = len(addons) + 1 + int(len(modded_content) * len(addons) / addons_done)
+        yield tracker.make('community')
+    tracker.total = len(addons) + 1 + len(modded_content)
+    content_types_by_name = {content_type.name: content_type for content_type in CONTENT_TYPES}
+
+    log("PROGRESS: Gathering activated packages from Content.xml...")
     if content_xml_path:
-        print(f"INFO: Using Content.xml at {content_xml_path.replace("\\\\?\\", "")}")
+        log(f"INFO: Using Content.xml at {content_xml_path.replace("\\\\?\\", "")}")
     else:
-        print("WARNING: Could not find Content.xml in the streamed packages folder.")
+        log("WARNING: Could not find Content.xml in the streamed packages folder.")
     activated_packages = None
     if content_xml_path:
-        with open(content_xml_path, 'r') as f:
-            activated_packages = []
-            lines = f.readlines()
-            for line in lines:
-                if '<Package name=' in line and 'active="Activated"' in line:
-                    package_name = line.split('"')[1]
-                    if not package_name.startswith("commounity"):
-                        activated_packages.append(package_name)
-    
-    print(f"PROGRESS: Checking streamed package overrides in the community folder...")
-    for airportICAO in airports.keys():
-        streamed_package_folder = find_airport_in_streamed_packages_folder(root_streamed_packages_folder, airportICAO)
+        activated_packages = read_activated_packages(content_xml_path)
+    tracker.done += 1
+    yield tracker.make('contentxml')
+
+    log("PROGRESS: Checking streamed package overrides in the community folder...")
+    streamed_packages_index = StreamedPackagesIndex(root_streamed_packages_folder)
+    for (content_type_name, content), addon_dirname in modded_content.items():
+        if cancel_event is not None and cancel_event.is_set():
+            result.cancelled = True
+            yield tracker.make('overrides', result=result)
+            return
+        description = f"Modded {content_type_name.lower()} {content}"
+        streamed_package_folder = content_types_by_name[content_type_name].matcher(content, streamed_packages_index)
         if streamed_package_folder:
             if activated_packages is not None and not any(x for x in activated_packages if x.endswith(streamed_package_folder)):
+                result.disabled[streamed_package_folder] = addon_dirname
                 if verbose:
-                    print(f"INFO: Modded airport {airportICAO} has a streamed package ({streamed_package_folder}), but it is disabled.")
+                    log(f"INFO: {description} has a streamed package ({streamed_package_folder}), but it is disabled.")
             elif not os.path.exists(os.path.join(root_community_folder, streamed_package_folder)):
-                missing_streamed_package_overrides[streamed_package_folder] = airports[airportICAO]
+                result.missing[streamed_package_folder] = addon_dirname
                 if verbose:
-                    print(f"WARNING: Modded airport {airportICAO} has a streamed package ({streamed_package_folder}), but no override in the community folder.")
+                    log(f"WARNING: {description} has a streamed package ({streamed_package_folder}), but no override in the community folder.")
             else:
-                existing_streamed_package_overrides[streamed_package_folder] = airports[airportICAO]
+                result.existing[streamed_package_folder] = addon_dirname
                 if verbose:
-                    print(f"INFO: Modded airport {airportICAO} has a streamed package override in the community folder.")
+                    log(f"INFO: {description} has a streamed package override in the community folder.")
         else:
+            result.unmatched[(content_type_name, content)] = addon_dirname
             if verbose:
-                print(f"INFO: Modded airport {airportICAO} has no streamed package.")
-    return existing_streamed_package_overrides if report_existing else missing_streamed_package_overrides
+                log(f"INFO: {description} has no streamed package.")
+        tracker.done += 1
+        yield tracker.make('overrides')
+    yield tracker.make('done', result=result)
+
+def scan(root_community_folder, root_streamed_packages_folder, verbose=False, log=None, progress_callback=None, cancel_event=None) -> ScanResult:
+    """
+    Runs a whole scan, see scan_streamed_package_overrides. `progress_callback` gets every ScanProgress update.
+    """
+    for progress in scan_streamed_package_overrides(root_community_folder, root_streamed_packages_folder, verbose, cancel_event, log):
+        if progress_callback:
+            progress_callback(progress)
+        if progress.result is not None:
+            return progress.result
+    raise RuntimeError("Scan ended without a result")
+
+def check_airports_in_streamed_packages_folder(root_community_folder, root_streamed_packages_folder, report_existing, verbose):
+    result = scan(root_community_folder, root_streamed_packages_folder, verbose, print)
+    return result.existing if report_existing else result.missing
+
+# What each mode does to a missing override. "check" only reports them, and "delete" removes existing link and
+# empty folder overrides instead.
+MODES = ['check', 'autolink', 'autofix', 'autodisable', 'delete']
+
+@dataclass
+class PlannedAction:
+    # One of 'link', 'folder', 'disable', 'unlink' or 'delete_folder'
+    kind: str
+    streamed_package: str
+    # The community add-on the override comes from, if known
+    addon: Optional[str] = None
+
+@dataclass
+class Plan:
+    mode: str
+    root_community_folder: str
+    content_xml_path: Optional[str]
+    actions: List[PlannedAction] = field(default_factory=list)
+
+@dataclass
+class ApplyResult:
+    applied: List[PlannedAction] = field(default_factory=list)
+    failed: List[Tuple[PlannedAction, str]] = field(default_factory=list)
+    # The Content.xml backup version taken before disabling packages in it, if any
+    backup_timestamp: Optional[str] = None
+
+def plan(scan_result: ScanResult, mode: str) -> Plan:
+    """ Work out what `mode` would do about the missing overrides found by a scan, without touching anything. """
+    if mode not in MODES or mode == 'delete':
+        raise ValueError(f"Unsupported mode for a scan result: {mode}")
+    result = Plan(mode, scan_result.root_community_folder, scan_result.content_xml_path)
+    kind = {'autolink': 'link', 'autofix': 'folder', 'autodisable': 'disable'}.get(mode)
+    if kind:
+        if kind == 'disable' and not scan_result.content_xml_path:
+            raise ValueError("Can't disable streamed packages without a Content.xml")
+        result.actions = [PlannedAction(kind, streamed_package, addon) for streamed_package, addon in scan_result.missing.items()]
+    return result
+
+def plan_delete(root_community_folder, root_streamed_packages_folder) -> Plan:
+    """ Plan removing every link or empty folder override in the community folder. """
+    result = Plan('delete', root_community_folder, None)
+    for dir in os.listdir(root_community_folder):
+        if os.path.isdir(os.path.join(root_community_folder, dir)) and os.path.exists(os.path.join(root_streamed_packages_folder, dir)):
+            if os.path.islink(os.path.join(root_community_folder, dir)):
+                result.actions.append(PlannedAction('unlink', dir))
+            elif not os.listdir(os.path.join(root_community_folder, dir)):
+                result.actions.append(PlannedAction('delete_folder', dir))
+    return result
+
+def apply(to_apply: Plan, log=None) -> ApplyResult:
+    """
+    Carry out a plan. Actions that fail are recorded rather than aborting the rest. Content.xml is backed up first,
+    and then rewritten once for all the packages to disable.
+    """
+    log = log or null_log
+    result = ApplyResult()
+    root_community_folder = to_apply.root_community_folder
+    to_disable = []
+    for action in to_apply.actions:
+        try:
+            if action.kind == 'link':
+                log(f"INFO: Creating link override for {action.streamed_package} in the community folder.")
+                os.symlink(os.path.join(root_community_folder, action.addon), os.path.join(root_community_folder, action.streamed_package), target_is_directory=True)
+            elif action.kind == 'folder':
+                log(f"INFO: Creating empty folder override for {action.streamed_package} in the community folder.")
+                os.makedirs(os.path.join(root_community_folder, action.streamed_package))
+            elif action.kind == 'unlink':
+                log(f"INFO: Unlinking override {action.streamed_package}.")
+                os.rmdir(os.path.join(root_community_folder, action.streamed_package))
+            elif action.kind == 'delete_folder':
+                log(f"INFO: Deleting empty folder override {action.streamed_package}.")
+                os.rmdir(os.path.join(root_community_folder, action.streamed_package))
+            elif action.kind == 'disable':
+                to_disable.append(action)
+                continue
+            result.applied.append(action)
+        except OSError as e:
+            log(f"ERROR: Could not apply override for {action.streamed_package}: {e}")
+            result.failed.append((action, str(e)))
+
+    if to_disable:
+        content_xml_path = to_apply.content_xml_path
+        # Backup the content.xml into the deduplicating backup store next to it
+        backup_entry = BackupStore(content_xml_path).backup()
+        result.backup_timestamp = backup_entry['timestamp']
+        log(f"INFO: Backed up Content.xml as version {backup_entry['timestamp']} (use content_backup.py to list, diff or restore backups)")
+        for action in to_disable:
+            log(f"INFO: Disabling streamed package {action.streamed_package} in Content.xml.")
+        streamed_packages = tuple(action.streamed_package for action in to_disable)
+        with open(content_xml_path, 'r') as f:
+            lines = f.readlines()
+        with open(content_xml_path, 'w') as f:
+            for line in lines:
+                if f'<Package name=' in line and line.split('"')[1].endswith(streamed_packages):
+                    f.write(line.replace('active="Activated"', 'active="UserDisabled"'))
+                else:
+                    f.write(line)
+        result.applied.extend(to_disable)
+    return result
+
+def run(root_community_folder, root_streamed_packages_folder, mode='check', verbose=False, log=None, progress_callback=None, cancel_event=None) -> Optional[ApplyResult]:
+    """
+    Scan, plan and apply in one go, logging the same report the command line tool prints.
+    Returns None if the scan was cancelled.
+    """
+    log = log or null_log
+    if mode == 'delete':
+        log("")
+        log("PROGRESS: Deleting all streamed package overrides in the community folder...")
+        return apply(plan_delete(root_community_folder, root_streamed_packages_folder), log)
+
+    scan_result = scan(root_community_folder, root_streamed_packages_folder, verbose, log, progress_callback, cancel_event)
+    if scan_result.cancelled:
+        log("PROGRESS: Scan cancelled.")
+        return None
+    log("PROGRESS: Scan complete.")
+    log("")
+    log("SUMMARY")
+    if not scan_result.missing:
+        log("INFO: All necessary streamed package overrides are present in the Community folder, or the packages disabled in Content.xml.")
+        return ApplyResult()
+    log("WARNING: The following streamed package overrides are missing from the community folder:")
+    for streamed_package in scan_result.missing.keys():
+        log(f"  {streamed_package}")
+    return apply(plan(scan_result, mode), lambda message: log("    " + message))
 
 def autodetect_community_folder():
-    root_community_folder = None
-    # try to automatically determine the community folder by parsing 
-    # '%localappdata%\Packages\Microsoft.Limitless_8wekyb3d8bbwe\LocalCache\usercfg.opt' 
-    # and looking for the 'InstalledPackagesPath' key
-    usercfg_path = os.path.join(os.getenv('LOCALAPPDATA'), 'Packages', 'Microsoft.Limitless_8wekyb3d8bbwe', 'LocalCache', 'usercfg.opt')
-    if not os.path.exists(usercfg_path):
-        usercfg_path = os.path.join(os.getenv('APPDATA'), 'Microsoft Flight Simulator 2024', 'usercfg.opt')
-    if os.path.exists(usercfg_path):
-        with open(usercfg_path, 'r') as f:
-            for line in f:
-                if 'InstalledPackagesPath' in line:
-                    root_installed_packages_folder = line.split(' ', 1)[1].strip().replace('"', '')
-                    root_community_folder = os.path.join(root_installed_packages_folder, 'Community')
-                    break
-    return root_community_folder
+    install = find_install("2024", vendor_order=AUTODETECT_VENDOR_ORDER)
+    return install.community_folder if install else None
 
 def autodetect_streamed_packages_folder(versions: Optional[List[str]] = None) -> str:
     root_streamed_packages_folder = ""
@@ -155,18 +448,22 @@ def autodetect_streamed_packages_folder(versions: Optional[List[str]] = None) ->
     # Post-SU1
     # Streamed Packages now live in the same parent directory as the Community folder
     if not versions or "su1" in versions:
-        root_community_folder = autodetect_community_folder()
-        if root_community_folder:
-            root_streamed_packages_folder = os.path.abspath(os.path.join(root_community_folder, '..', 'StreamedPackages'))
+        install = find_install("2024", vendor_order=AUTODETECT_VENDOR_ORDER)
+        if install:
+            root_streamed_packages_folder = install.streamed_packages_folder
         
     if not versions or "retail" in versions:
         # Pre-SU1
-        # Try to automatically determine the streamed packages folder by looking for the MS Store location
-        if not os.path.exists(root_streamed_packages_folder):
-            root_streamed_packages_folder = os.path.join(os.getenv('LOCALAPPDATA'), 'Packages', 'Microsoft.Limitless_8wekyb3d8bbwe', 'LocalState', 'StreamedPackages')
-        # Try the Steam location, if we still haven't found it
-        if not os.path.exists(root_streamed_packages_folder):
-            root_streamed_packages_folder = os.path.join(os.getenv('APPDATA'), 'Microsoft Flight Simulator 2024', 'StreamedPackages')
+        # Streamed Packages lived in LocalState next to LocalCache for the MS Store, and next to UserCfg.opt for Steam.
+        # Try where UserCfg.opt was found first, then its usual folders, in case it wasn't.
+        usercfg_dirs = [(install.vendor, os.path.dirname(install.usercfg_path)) for install in find_installs(vendor_order=AUTODETECT_VENDOR_ORDER) if install.sim == "2024"]
+        for vendor, usercfg_dir in usercfg_dirs + get_fixed_usercfg_dirs("2024", AUTODETECT_VENDOR_ORDER):
+            if os.path.exists(root_streamed_packages_folder):
+                break
+            if vendor == "MS Store":
+                root_streamed_packages_folder = os.path.abspath(os.path.join(usercfg_dir, '..', 'LocalState', 'StreamedPackages'))
+            else:
+                root_streamed_packages_folder = os.path.join(usercfg_dir, 'StreamedPackages')
             
     return root_streamed_packages_folder
    
@@ -200,7 +497,7 @@ def main():
         parser.print_help()
         return
     print(f"INFO: Using community folder {root_community_folder}")
-    root_community_folder = u"\\\\?\\" + root_community_folder.replace("/", "\\")
+    root_community_folder = long_path(root_community_folder)
     
     root_streamed_packages_folder = args.streamedpackages
     if not root_streamed_packages_folder:
@@ -211,53 +508,10 @@ def main():
         parser.print_help()
         return
     print(f"INFO: Using streamed packages folder {root_streamed_packages_folder}")
-    root_streamed_packages_folder = u"\\\\?\\" + root_streamed_packages_folder.replace("/", "\\")
+    root_streamed_packages_folder = long_path(root_streamed_packages_folder)
     
-    if args.delete:
-        print()
-        # for each folder in community that matches the name of a folder in streamedpackages and is a symlink or an empty folder, delete it
-        print("PROGRESS: Deleting all streamed package overrides in the community folder...")
-        for dir in os.listdir(root_community_folder):
-            if os.path.isdir(os.path.join(root_community_folder, dir)) and os.path.exists(os.path.join(root_streamed_packages_folder, dir)):
-                if os.path.islink(os.path.join(root_community_folder, dir)):
-                    print(f"INFO: Unlinking override {dir}.")
-                    os.rmdir(os.path.join(root_community_folder, dir))
-                elif not os.listdir(os.path.join(root_community_folder, dir)):
-                    print(f"INFO: Deleting empty folder override {dir}.")
-                    os.rmdir(os.path.join(root_community_folder, dir))
-    else:
-        streamed_package_overrides = check_airports_in_streamed_packages_folder(root_community_folder, root_streamed_packages_folder, False, args.verbose)
-        print("PROGRESS: Scan complete.")
-        print()
-        print("SUMMARY")
-        if streamed_package_overrides:
-            if args.autodisable:
-                # Backup the content.xml with a datetime in the backed up filename
-                content_xml_path = get_content_xml_path(root_streamed_packages_folder)
-                backup_filename = content_xml_path + datetime.datetime.now().strftime(".backup_%Y%m%d%H%M%S")
-                shutil.copy(content_xml_path, backup_filename)
-                print(f"INFO: Backed up Content.xml to {os.path.basename(backup_filename)}")
-            print(f"WARNING: The following streamed package overrides are missing from the community folder:")
-            for streamed_package in streamed_package_overrides.keys():
-                print(f"  {streamed_package}")
-                if args.autolink:
-                    print(f"    INFO: Creating link override for {streamed_package} in the community folder.")
-                    os.symlink(os.path.join(root_community_folder, streamed_package_overrides[streamed_package]), os.path.join(root_community_folder, streamed_package), target_is_directory=True)
-                elif args.autofix:
-                    print(f"    INFO: Creating empty folder override for {streamed_package} in the community folder.")
-                    os.makedirs(os.path.join(root_community_folder, streamed_package))
-                elif args.autodisable:
-                    print(f"    INFO: Disabling streamed package {streamed_package} in Content.xml.")
-                    with open(content_xml_path, 'r') as f:
-                        lines = f.readlines()
-                    with open(content_xml_path, 'w') as f:
-                        for line in lines:
-                            if f'<Package name=' in line and line.split('"')[1].endswith(streamed_package):
-                                f.write(line.replace('active="Activated"', 'active="UserDisabled"'))
-                            else:
-                                f.write(line)
-        else:
-            print("INFO: All necessary streamed package overrides are present in the Community folder, or the packages disabled in Content.xml.")
+    mode = next((x for x in MODES if getattr(args, x, False)), 'check')
+    run(root_community_folder, root_streamed_packages_folder, mode, args.verbose, print)
     if not args.noinput:
         print()
         # pause before exiting
@@ -1,11 +1,13 @@
 import os
+import queue
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-from check_airports import redirect_print, main, autodetect_community_folder, autodetect_streamed_packages_folder, version
-import sys
+from tkinter import filedialog, messagebox, scrolledtext, ttk
+from check_airports import run, long_path, autodetect_community_folder, autodetect_streamed_packages_folder, version
 import threading
 import json
 
+EVENTS_POLL_INTERVAL_MS = 100
+
 class AirportCheckerUI:
     def __init__(self, root):
         self.CONFIG_FILE = "config.json"
@@ -54,10 +56,27 @@ class AirportCheckerUI:
         tk.Radiobutton(root, text="Add Overrides: Disable in Content.xml", variable=self.mode_var, value="autodisable").grid(row=5, column=1, padx=5, pady=0, sticky="w")
         tk.Radiobutton(root, text="Remove non-Content.xml Overrides", variable=self.mode_var, value="delete").grid(row=6, column=1, padx=5, pady=0, sticky="w")
         
-        # Run Button
-        self.run_button = tk.Button(root, text="Run", command=self.run_check)
-        self.run_button.grid(row=7, column=0, padx=5, pady=10, sticky="w")
+        # Run / Cancel Buttons
+        run_frame = tk.Frame(root)
+        run_frame.grid(row=7, column=0, padx=5, pady=10, sticky="w")
+        self.run_button = tk.Button(run_frame, text="Run", command=self.run_check)
+        self.run_button.pack(side="left")
+        self.cancel_button = tk.Button(run_frame, text="Cancel", command=self.cancel_check, state=tk.DISABLED)
+        self.cancel_button.pack(side="left", padx=5)
         tk.Button(root, text="Save Log", command=self.save_log).grid(row=7, column=2, padx=5, pady=10)
+
+        # Progress Bar
+        progress_frame = tk.Frame(root)
+        progress_frame.grid(row=7, column=1, padx=5, pady=10, sticky="ew")
+        self.progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", mode="determinate")
+        self.progress_bar.pack(side="left", fill="x", expand=True)
+        self.progress_label_var = tk.StringVar()
+        tk.Label(progress_frame, textvariable=self.progress_label_var, width=40, anchor="w").pack(side="left", padx=5)
+
+        # The scan thread posts its log lines and progress here, and the Tk loop picks them up, as only the Tk
+        # thread may touch widgets
+        self.events_queue = queue.Queue()
+        self.cancel_event = None
         
         # Output Area
         self.output_area = scrolledtext.ScrolledText(root, width=70, height=20, wrap=tk.WORD)
@@ -136,40 +155,73 @@ class AirportCheckerUI:
         # Clear the output area
         self.output_area.delete("1.0", tk.END)
 
-        # Redirect print output to the UI
-        def print_to_ui(message):
-            """Write captured print output to the text area."""
-            self.output_area.insert(tk.END, message)
-            self.output_area.see(tk.END)  # Auto-scroll to the bottom
-
-        redirect_print(print_to_ui)  # Redirect prints to the UI
         self.run_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(value=0, maximum=1)
+        self.progress_label_var.set("")
+        self.cancel_event = threading.Event()
+        cancel_event = self.cancel_event
+        events = self.events_queue
         
         # Run check_airports logic in a separate thread to keep UI responsive
         def run_task():
+            def log(message):
+                events.put(("log", message))
             try:
-                sys.argv = ["check_airports.py"]
-                if verbose:
-                    sys.argv.append("--verbose")
-                if mode == "autofix":
-                    sys.argv.append("--autofix")
-                elif mode == "autolink":
-                    sys.argv.append("--autolink")
-                elif mode == "autodisable":
-                    sys.argv.append("--autodisable")
-                elif mode == "delete":
-                    sys.argv.append("--delete")
-                sys.argv.extend(["--community", community_folder, "--streamedpackages", streamed_folder])
-                sys.argv.extend(["--noinput"])  # Disable user input prompts
-
-                main()
+                log(f"check_airports.py v{version}")
+                log("")
+                log(f"INFO: Using community folder {community_folder}")
+                log(f"INFO: Using streamed packages folder {streamed_folder}")
+                run(long_path(community_folder), long_path(streamed_folder), mode, verbose, log,
+                    lambda progress: events.put(("progress", progress)), cancel_event)
             except Exception as e:
-                print_to_ui(f"Error: {e}\n")
+                log(f"Error: {e}")
             finally:
-                self.run_button.config(state=tk.NORMAL)
-                redirect_print(None)  # Restore default behavior
+                events.put(("done", None))
 
         threading.Thread(target=run_task, daemon=True).start()
+        self.root.after(EVENTS_POLL_INTERVAL_MS, self.poll_events)
+
+    def cancel_check(self):
+        if self.cancel_event:
+            self.cancel_event.set()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.progress_label_var.set("Cancelling...")
+
+    def poll_events(self):
+        progress = None
+        finished = False
+        log_lines = []
+        while True:
+            try:
+                kind, item = self.events_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                log_lines.append(item + "\n")
+            elif kind == "progress":
+                # Only the latest progress update matters
+                progress = item
+            else:
+                finished = True
+        if log_lines:
+            self.output_area.insert(tk.END, "".join(log_lines))
+            self.output_area.see(tk.END)  # Auto-scroll to the bottom
+        if progress is not None:
+            self.progress_bar.config(maximum=max(progress.total, 1), value=progress.done)
+            if progress.cancelled:
+                self.progress_label_var.set("Cancelled")
+            elif progress.result is not None:
+                self.progress_label_var.set(f"{progress.done} items scanned")
+            else:
+                eta = f", ETA {progress.eta_seconds:.0f}s" if progress.eta_seconds is not None else ""
+                self.progress_label_var.set(f"{progress.done}/~{progress.total} at {progress.items_per_second:.0f}/s{eta}")
+        if finished:
+            self.run_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+            self.cancel_event = None
+        else:
+            self.root.after(EVENTS_POLL_INTERVAL_MS, self.poll_events)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,195 @@
+# Named community "profiles" (e.g. airliner ops, GA VFR), built on the same directory links --autolink uses.
+# Add-ons live in a library folder instead of the Community folder. A profile is just a list of library package
+# names, stored in profiles.json inside the library folder. Activating a profile diffs the links currently in the
+# Community folder against the profile, then only removes and creates the links that differ, so switching profiles
+# never moves any add-on data and the sim only has to index what's linked in.
+version = '0.1.0'
+
+import argparse
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from check_airports import autodetect_community_folder
+
+PROFILES_FILENAME = 'profiles.json'
+
+@dataclass
+class ProfileDiff:
+    to_create: List[str] = field(default_factory=list)
+    to_remove: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Profile entries that can't be linked, either because they aren't in the library, or because a real folder
+    # (or a link we don't manage) with the same name is in the way in the Community folder
+    missing: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+
+def get_default_library_folder(community_root: str) -> str:
+    return os.path.abspath(os.path.join(community_root, '..', 'CommunityLibrary'))
+
+def load_profiles(library_root: str) -> Dict[str, List[str]]:
+    try:
+        with open(os.path.join(library_root, PROFILES_FILENAME), 'r', encoding='utf8') as f:
+            return json.load(f).get('profiles', {})
+    except FileNotFoundError:
+        return {}
+
+def save_profiles(library_root: str, profiles: Dict[str, List[str]]):
+    profiles_path = os.path.join(library_root, PROFILES_FILENAME)
+    temp_path = profiles_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf8') as f:
+        json.dump({'profiles': profiles}, f, indent=4)
+    os.replace(temp_path, profiles_path)
+
+def list_library_packages(library_root: str) -> List[str]:
+    return sorted(x for x in os.listdir(library_root) if os.path.isdir(os.path.join(library_root, x)))
+
+def normalize_path(path: str) -> str:
+    if path.startswith("\\\\?\\"):
+        path = path[4:]
+    return os.path.normcase(os.path.abspath(path)).rstrip('/\\')
+
+def get_link_target(path: str) -> str:
+    return normalize_path(os.path.join(os.path.dirname(path), os.readlink(path)))
+
+def is_link_into(path: str, target_root: str) -> bool:
+    if not os.path.islink(path):
+        return False
+    return os.path.dirname(get_link_target(path)) == normalize_path(target_root)
+
+def get_linked_packages(community_root: str, library_root: str) -> List[str]:
+    # Only links that point straight into the library are ours to manage
+    return sorted(x for x in os.listdir(community_root) if is_link_into(os.path.join(community_root, x), library_root))
+
+def compute_profile_diff(community_root: str, library_root: str, packages: List[str]) -> ProfileDiff:
+    diff = ProfileDiff()
+    linked = set(get_linked_packages(community_root, library_root))
+    available = set(list_library_packages(library_root))
+    wanted = set()
+    for package in packages:
+        if package not in available:
+            diff.missing.append(package)
+        elif package in linked:
+            diff.unchanged.append(package)
+            wanted.add(package)
+        elif os.path.lexists(os.path.join(community_root, package)):
+            diff.conflicts.append(package)
+        else:
+            diff.to_create.append(package)
+            wanted.add(package)
+    diff.to_remove = sorted(linked - wanted)
+    return diff
+
+def remove_link(path: str):
+    # Directory links need rmdir on Windows, but unlink everywhere else
+    if os.name == 'nt':
+        os.rmdir(path)
+    else:
+        os.unlink(path)
+
+def find_dangling_overrides(community_root: str, removed_packages: List[str]) -> List[str]:
+    """
+    Streamed package overrides created with --autolink point at the add-on's folder in the Community folder.
+    Once that add-on is unlinked, those overrides dangle, so find them to be removed as well.
+    """
+    removed = set(os.path.normcase(x) for x in removed_packages)
+    dangling = []
+    for dir in os.listdir(community_root):
+        path = os.path.join(community_root, dir)
+        if os.path.islink(path) and is_link_into(path, community_root) and not os.path.exists(path):
+            if os.path.basename(get_link_target(path)) in removed:
+                dangling.append(dir)
+    return dangling
+
+def apply_profile_diff(community_root: str, library_root: str, diff: ProfileDiff, verbose: bool = False) -> List[str]:
+    for package in diff.to_remove:
+        if verbose:
+            print(f"INFO: Unlinking {package}.")
+        remove_link(os.path.join(community_root, package))
+    dangling = find_dangling_overrides(community_root, diff.to_remove)
+    for override in dangling:
+        if verbose:
+            print(f"INFO: Unlinking dangling override {override}.")
+        remove_link(os.path.join(community_root, override))
+    for package in diff.to_create:
+        if verbose:
+            print(f"INFO: Linking {package}.")
+        os.symlink(os.path.join(library_root, package), os.path.join(community_root, package), target_is_directory=True)
+    return dangling
+
+def activate_profile(community_root: str, library_root: str, name: str, dry_run: bool = False, verbose: bool = False) -> ProfileDiff:
+    profiles = load_profiles(library_root)
+    if name not in profiles:
+        raise KeyError(f"Unknown profile: {name}")
+    diff = compute_profile_diff(community_root, library_root, profiles[name])
+    if not dry_run:
+        apply_profile_diff(community_root, library_root, diff, verbose)
+    return diff
+
+def main():
+    print(f"community_profiles.py v{version}")
+    print()
+    parser = argparse.ArgumentParser(description='Switch between named sets of community add-ons by swapping links in the Community folder.')
+    parser.add_argument('command', choices=['list', 'show', 'activate', 'save', 'delete', 'deactivate'], help='What to do.')
+    parser.add_argument('profile', type=str, nargs='?', help='The profile name.')
+    parser.add_argument('packages', type=str, nargs='*', help='For save: the library packages in the profile. Defaults to the currently linked ones.')
+    parser.add_argument('--community', type=str, help='The root community folder.')
+    parser.add_argument('--library', type=str, help='The add-on library folder. Defaults to CommunityLibrary next to the Community folder.')
+    parser.add_argument('--dry-run', action='store_true', help='Only print what would change.')
+    parser.add_argument('--verbose', action='store_true', help='Print verbose output.')
+    args = parser.parse_args()
+
+    community_root = args.community or autodetect_community_folder()
+    if not community_root or not os.path.exists(community_root):
+        print("ERROR: No community folder specified, nor could one be found automatically.")
+        return
+    library_root = args.library or get_default_library_folder(community_root)
+    if not os.path.isdir(library_root):
+        print(f"ERROR: Library folder {library_root} does not exist.")
+        return
+    print(f"INFO: Using community folder {community_root}")
+    print(f"INFO: Using library folder {library_root}")
+
+    if args.command in ['show', 'activate', 'save', 'delete'] and not args.profile:
+        print(f"ERROR: {args.command} needs a profile name.")
+        return
+
+    profiles = load_profiles(library_root)
+    if args.command == 'list':
+        linked = set(get_linked_packages(community_root, library_root))
+        for name, packages in sorted(profiles.items()):
+            marker = '*' if set(packages) == linked else ' '
+            print(f"{marker} {name} ({len(packages)} packages)")
+    elif args.command == 'show':
+        for package in profiles.get(args.profile, []):
+            print(f"  {package}")
+    elif args.command == 'save':
+        packages = args.packages or get_linked_packages(community_root, library_root)
+        profiles[args.profile] = sorted(packages)
+        save_profiles(library_root, profiles)
+        print(f"INFO: Saved profile {args.profile} with {len(packages)} packages.")
+    elif args.command == 'delete':
+        profiles.pop(args.profile, None)
+        save_profiles(library_root, profiles)
+        print(f"INFO: Deleted profile {args.profile}.")
+    else:
+        if args.command == 'deactivate':
+            diff = compute_profile_diff(community_root, library_root, [])
+            if not args.dry_run:
+                apply_profile_diff(community_root, library_root, diff, args.verbose)
+        else:
+            try:
+                diff = activate_profile(community_root, library_root, args.profile, args.dry_run, args.verbose)
+            except KeyError as e:
+                print(f"ERROR: {e.args[0]}")
+                return
+        for package in diff.missing:
+            print(f"WARNING: {package} is not in the library folder.")
+        for package in diff.conflicts:
+            print(f"WARNING: {package} already exists in the community folder and isn't a library link, leaving it alone.")
+        prefix = "Would link" if args.dry_run else "Linked"
+        print(f"INFO: {prefix} {len(diff.to_create)}, {'would unlink' if args.dry_run else 'unlinked'} {len(diff.to_remove)}, kept {len(diff.unchanged)} packages.")
+
+if __name__ == '__main__':
+    main()
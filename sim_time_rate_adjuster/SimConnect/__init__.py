@@ -1,5 +1,5 @@
 from .SimConnect import SimConnect, millis, DWORD
-from .RequestList import AircraftRequests, Request
+from .RequestList import AircraftRequests, Request, RequestGroup
 from .EventList import AircraftEvents, Event
 from .FacilitiesList import FacilitiesRequests, Facilitie
 
@@ -14,4 +14,4 @@ def int_or_str(value):
 __version__ = "0.4.26"
 VERSION = tuple(map(int_or_str, __version__.split(".")))
 
-__all__ = ["SimConnect", "Request", "Event", "millis", "DWORD", "AircraftRequests", "AircraftEvents", "FacilitiesRequests"]
+__all__ = ["SimConnect", "Request", "RequestGroup", "Event", "millis", "DWORD", "AircraftRequests", "AircraftEvents", "FacilitiesRequests"]
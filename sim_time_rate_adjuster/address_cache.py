@@ -0,0 +1,93 @@
+#pylint: disable=line-too-long, missing-function-docstring
+
+''' Remembers how the seconds offset address was found, per FlightSimulator2024.exe build. '''
+
+# The structure's heap address changes every launch, but the module offset its pointers point to, the spacing of the
+# two pointers and the offset of the seconds field within the structure only change with a new build of the sim. Those
+# are cached here, keyed on the exe's path, file version and size plus the PE header's link timestamp (which tells
+# builds apart without hashing the whole exe), so later starts can scan for just the one pointer that worked.
+
+import ctypes
+import json
+import os
+import struct
+import threading
+
+ADDRESS_CACHE_VERSION = 1
+
+def get_address_cache_path():
+    cache_root = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_root, 'msfs-2024-utils', 'sim_time_rate_adjuster_addresses.json')
+
+def get_file_version(path):
+    ''' The exe's file version, e.g. "1.2.3.0", or None if it can't be read (or this isn't Windows). '''
+    try:
+        version_dll = ctypes.windll.version
+    except AttributeError:
+        return None
+    size = version_dll.GetFileVersionInfoSizeW(path, None)
+    if not size:
+        return None
+    data = ctypes.create_string_buffer(size)
+    if not version_dll.GetFileVersionInfoW(path, 0, size, data):
+        return None
+    info = ctypes.c_void_p()
+    length = ctypes.c_uint()
+    if not version_dll.VerQueryValueW(data, "\\", ctypes.byref(info), ctypes.byref(length)) or length.value < 16:
+        return None
+    # VS_FIXEDFILEINFO: dwSignature, dwStrucVersion, dwFileVersionMS, dwFileVersionLS, ...
+    version_ms, version_ls = struct.unpack_from("<2I", ctypes.string_at(info.value, 16), 8)
+    return f"{version_ms >> 16}.{version_ms & 0xFFFF}.{version_ls >> 16}.{version_ls & 0xFFFF}"
+
+def get_pe_timestamp(pe_header):
+    ''' The link timestamp from the start of a loaded module (its DOS and PE headers). '''
+    pe_offset = struct.unpack_from("<I", pe_header, 0x3C)[0]
+    return struct.unpack_from("<I", pe_header, pe_offset + 8)[0]
+
+def get_build_key(process_path, pe_header):
+    ''' What identifies the sim's build: the exe's path, file version, size and link timestamp. '''
+    try:
+        size = os.stat(process_path).st_size
+    except (OSError, TypeError):
+        size = None
+    return {
+        "path": process_path,
+        "file_version": get_file_version(process_path) if process_path else None,
+        "size": size,
+        "timestamp": get_pe_timestamp(pe_header),
+    }
+
+def load_address_cache():
+    try:
+        with open(get_address_cache_path(), 'r', encoding='utf8') as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if cache.get("version") != ADDRESS_CACHE_VERSION:
+        return {}
+    return cache.get("builds", {})
+
+def load_address_recipe(build_key):
+    ''' The cached module_offset, pointer_spacing and field_offset for this build, or None. '''
+    entry = load_address_cache().get(str(build_key["path"]))
+    if not entry or entry.get("build") != build_key:
+        return None
+    return entry
+
+def save_address_recipe(build_key, module_offset, pointer_spacing, field_offset):
+    builds = load_address_cache()
+    builds[str(build_key["path"])] = {
+        "build": build_key,
+        "module_offset": module_offset,
+        "pointer_spacing": pointer_spacing,
+        "field_offset": field_offset,
+    }
+    cache_path = get_address_cache_path()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = cache_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf8') as f:
+            json.dump({"version": ADDRESS_CACHE_VERSION, "builds": builds}, f, indent=2)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass # The cache is only an optimization
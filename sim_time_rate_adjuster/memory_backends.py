@@ -0,0 +1,281 @@
+#pylint: disable=line-too-long, missing-function-docstring
+
+''' Access to a process' memory: FlightSimulator2024.exe through pymem, any Linux process, or a synthetic image. '''
+
+# Discovery and the offset adjustments only use a MemoryBackend: its module info, the private read/write regions to
+# scan, bulk and scatter-gather reads, and writes. PymemBackend is what the adjuster runs on. LinuxBackend reads and
+# writes another process with process_vm_readv/process_vm_writev (e.g. the sim under Proton), and SyntheticBackend
+# is an in-memory process image, built to FlightSimulator2024's layout by build_fake_flightsim, so discovery can be
+# developed, tested and benchmarked on Linux without the sim.
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import random
+import re
+import struct
+import threading
+
+# VirtualQueryEx constants
+MEM_COMMIT = 0x1000
+MEM_PRIVATE = 0x20000
+PAGE_READWRITE = 0x04
+MAX_USER_ADDRESS = 0x7FFF_FFFF_FFFF
+
+MIN_SCAN_REGION_SIZE = 0x1000
+MAX_SCAN_REGION_SIZE = 0x2000_0000
+
+def merge_adjacent_regions(regions):
+    merged = []
+    for base, size in sorted(regions):
+        if merged and merged[-1][0] + merged[-1][1] == base:
+            merged[-1] = (merged[-1][0], merged[-1][1] + size)
+        else:
+            merged.append((base, size))
+    return merged
+
+def split_large_regions(regions, max_size):
+    ''' The regions, with those longer than `max_size` split into `max_size` long pieces. '''
+    return [(base + offset, min(max_size, size - offset)) for base, size in regions for offset in range(0, size, max_size)]
+
+class MemoryBackend:
+    ''' A process' memory. Subclasses provide the module info, get_regions, read_bytes and write_bytes. '''
+    # What a failed read or write raises
+    errors = (OSError,)
+    base_address = 0
+    image_size = 0
+    process_path = None
+
+    def get_regions(self, min_size=MIN_SCAN_REGION_SIZE, max_size=MAX_SCAN_REGION_SIZE):
+        ''' The (base, size) of every committed, private, read/write region of `min_size` to `max_size`, with adjacent ones
+            merged. Where a region's size can't tell a huge allocation from many merged ones, larger regions are split
+            into `max_size` pieces instead of being skipped. '''
+        raise NotImplementedError
+
+    def read_bytes(self, address, length):
+        raise NotImplementedError
+
+    def read_scatter(self, spans):
+        ''' The bytes of each (address, length) in `spans`, or None for those that can't be read. '''
+        results = []
+        for address, length in spans:
+            try:
+                results.append(self.read_bytes(address, length))
+            except self.errors:
+                results.append(None)
+        return results
+
+    def write_bytes(self, address, data):
+        raise NotImplementedError
+
+    def read_float(self, address):
+        return struct.unpack("<f", self.read_bytes(address, 4))[0]
+
+    def write_float(self, address, value):
+        self.write_bytes(address, struct.pack("<f", value))
+
+class PymemBackend(MemoryBackend):
+    def __init__(self, pm):
+        import pymem # type: ignore # pylint: disable=import-outside-toplevel
+        self.pm = pm
+        self.errors = (pymem.exception.MemoryReadError, pymem.exception.MemoryWriteError, pymem.exception.WinAPIError)
+        self.base_address = pm.base_address
+        self.image_size = pm.process_base.SizeOfImage
+        self.process_path = pm.process_base.filename
+
+    def get_regions(self, min_size=MIN_SCAN_REGION_SIZE, max_size=MAX_SCAN_REGION_SIZE):
+        import pymem.memory # type: ignore # pylint: disable=import-outside-toplevel
+        regions = []
+        address = 0
+        while address < MAX_USER_ADDRESS:
+            mbi = pymem.memory.virtual_query(self.pm.process_handle, address)
+            base = mbi.BaseAddress or 0
+            size = mbi.RegionSize
+            if size == 0:
+                break # Past the last region (or VirtualQueryEx failed)
+            if mbi.State == MEM_COMMIT and mbi.Type == MEM_PRIVATE and mbi.Protect == PAGE_READWRITE and min_size <= size <= max_size:
+                regions.append((base, size))
+            address = base + size
+        return merge_adjacent_regions(regions)
+
+    def read_bytes(self, address, length):
+        return self.pm.read_bytes(address, length)
+
+    def write_bytes(self, address, data):
+        self.pm.write_bytes(address, data, len(data))
+
+    def read_float(self, address):
+        return self.pm.read_float(address)
+
+    def write_float(self, address, value):
+        self.pm.write_float(address, value)
+
+class IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+# Linux' limit on the number of iovecs in one call
+IOV_MAX = 1024
+
+class LinuxBackend(MemoryBackend):
+    ''' Another Linux process, found by pid. The module is the one mapped from a file named `module_name`. '''
+    def __init__(self, pid, module_name="FlightSimulator2024.exe"):
+        self.pid = pid
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        for name in ["process_vm_readv", "process_vm_writev"]:
+            function = getattr(self.libc, name)
+            function.argtypes = [ctypes.c_int, ctypes.POINTER(IoVec), ctypes.c_ulong, ctypes.POINTER(IoVec), ctypes.c_ulong, ctypes.c_ulong]
+            function.restype = ctypes.c_ssize_t
+
+        module_ranges = [(start, end, path) for start, end, _, path in self.get_maps() if os.path.basename(path.replace("\\", "/")).lower() == module_name.lower()]
+        if module_ranges:
+            self.base_address = min(x[0] for x in module_ranges)
+            self.image_size = max(x[1] for x in module_ranges) - self.base_address
+            self.process_path = module_ranges[0][2]
+
+    @staticmethod
+    def find_pid(process_name):
+        ''' The pid of the first process whose executable (argv[0], Windows paths included) is `process_name`, or None. '''
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/cmdline", "rb") as f:
+                    argv0 = f.read().split(b"\0")[0].decode("utf8", "replace")
+            except OSError:
+                continue
+            if re.split(r"[\\/]", argv0)[-1].lower() == process_name.lower():
+                return int(entry)
+        return None
+
+    def get_maps(self):
+        ''' (start, end, permissions, path) of every mapping in /proc/<pid>/maps. '''
+        maps = []
+        with open(f"/proc/{self.pid}/maps", "r", encoding="utf8", errors="replace") as f:
+            for line in f:
+                fields = line.split(maxsplit=5)
+                start, end = (int(x, 16) for x in fields[0].split("-"))
+                maps.append((start, end, fields[1], fields[5].strip() if len(fields) > 5 else ""))
+        return maps
+
+    def get_regions(self, min_size=MIN_SCAN_REGION_SIZE, max_size=MAX_SCAN_REGION_SIZE):
+        # Anonymous private read/write mappings are what VirtualAlloc and the heaps are made of
+        # The kernel merges adjacent anonymous mappings with the same flags, so a heap of any size can be one mapping
+        regions = [(start, end - start) for start, end, permissions, path in self.get_maps() if permissions.startswith("rw") and permissions[3] == "p" and (not path or path == "[heap]" or path.startswith("[anon")) and end - start >= min_size]
+        return split_large_regions(merge_adjacent_regions(regions), max_size)
+
+    def transfer(self, function, spans, buffers):
+        ''' Move each span to/from its buffer with as few calls as possible. Returns which spans were transferred in full. '''
+        done = [False] * len(spans)
+        i = 0
+        while i < len(spans):
+            count = min(IOV_MAX, len(spans) - i)
+            local = (IoVec * count)(*[(ctypes.addressof(buffers[i + j]), spans[i + j][1]) for j in range(count)])
+            remote = (IoVec * count)(*[(spans[i + j][0], spans[i + j][1]) for j in range(count)])
+            transferred = function(self.pid, local, count, remote, count, 0)
+            if transferred < 0:
+                error = ctypes.get_errno()
+                if error != errno.EFAULT:
+                    raise OSError(error, os.strerror(error))
+                transferred = 0
+            # Transfers stop at the first span that fails, so skip past that one and carry on with the rest
+            while count and transferred >= spans[i][1]:
+                transferred -= spans[i][1]
+                done[i] = True
+                i += 1
+                count -= 1
+            if count:
+                i += 1
+        return done
+
+    def read_scatter(self, spans):
+        buffers = [ctypes.create_string_buffer(length) for _, length in spans]
+        done = self.transfer(self.libc.process_vm_readv, spans, buffers)
+        return [buffer.raw if ok else None for buffer, ok in zip(buffers, done)]
+
+    def read_bytes(self, address, length):
+        data = self.read_scatter([(address, length)])[0]
+        if data is None:
+            raise OSError(errno.EFAULT, f"Could not read 0x{length:X} bytes at 0x{address:X}")
+        return data
+
+    def write_bytes(self, address, data):
+        buffer = ctypes.create_string_buffer(bytes(data), len(data))
+        if not self.transfer(self.libc.process_vm_writev, [(address, len(data))], [buffer])[0]:
+            raise OSError(errno.EFAULT, f"Could not write 0x{len(data):X} bytes at 0x{address:X}")
+
+class SyntheticBackend(MemoryBackend):
+    ''' An in-memory process image: the module's bytes at `base_address`, and {base: bytearray} private regions. '''
+    def __init__(self, base_address, image, regions, process_path="C:\\XboxGames\\Microsoft Flight Simulator 2024\\Content\\FlightSimulator2024.exe"):
+        self.base_address = base_address
+        self.image_size = len(image)
+        self.process_path = process_path
+        self.image = bytearray(image)
+        self.regions = dict(regions)
+        self.lock = threading.Lock()
+
+    def find(self, address, length):
+        for base, buffer in [(self.base_address, self.image), *self.regions.items()]:
+            if base <= address and address + length <= base + len(buffer):
+                return buffer, address - base
+        raise OSError(errno.EFAULT, f"0x{length:X} bytes at 0x{address:X} aren't mapped")
+
+    def get_regions(self, min_size=MIN_SCAN_REGION_SIZE, max_size=MAX_SCAN_REGION_SIZE):
+        # Like LinuxBackend, as a synthetic heap is one region however big it is
+        regions = [(base, len(buffer)) for base, buffer in self.regions.items() if len(buffer) >= min_size]
+        return split_large_regions(merge_adjacent_regions(regions), max_size)
+
+    def read_bytes(self, address, length):
+        buffer, offset = self.find(address, length)
+        with self.lock:
+            return bytes(buffer[offset:offset + length])
+
+    def write_bytes(self, address, data):
+        buffer, offset = self.find(address, len(data))
+        with self.lock:
+            buffer[offset:offset + len(data)] = data
+
+class FakeClockEvents:
+    ''' Stands in for AircraftEvents: the CLOCK_MINUTES_DEC/INC events move the float at `seconds_offset_address` by a
+        minute, `latency` seconds later, like the sim does a frame or so after the event. '''
+    def __init__(self, memory, seconds_offset_address, latency=0.03):
+        self.memory = memory
+        self.seconds_offset_address = seconds_offset_address
+        self.latency = latency
+
+    def find(self, name):
+        minutes = {"CLOCK_MINUTES_DEC": -1, "CLOCK_MINUTES_INC": 1}[name]
+        def fire(value=1):
+            def apply():
+                with self.memory.lock:
+                    buffer, offset = self.memory.find(self.seconds_offset_address, 4)
+                    seconds_offset = struct.unpack_from("<f", buffer, offset)[0]
+                    struct.pack_into("<f", buffer, offset, seconds_offset + 60 * minutes * value)
+            threading.Timer(self.latency, apply).start()
+        return fire
+
+def build_fake_flightsim(image_size=0x400_0000, heap_size=0x1000_0000, seed=0, pointer_spacing=0x20, field_offset=0x34, seconds_offset=0.0, decoys=1000):
+    ''' A SyntheticBackend laid out like FlightSimulator2024.exe: the module holds the Weather\\Presets string, and the heap
+        holds a pair of pointers to just before it with the seconds offset after them, among `decoys` lone pointers and
+        -60s. Returns the backend, its FakeClockEvents, and the true seconds offset address. '''
+    rng = random.Random(seed)
+    base_address = 0x7FF6_0000_0000
+    heap_base = 0x1_8000_0000
+
+    image = bytearray(rng.randbytes(image_size))
+    string_offset = rng.randrange(image_size // 2, image_size - 0x100) & ~0xF
+    image[string_offset:string_offset + 15] = b"Weather\\Presets"
+    pointer = struct.pack("<Q", base_address + string_offset - 8)
+
+    heap = bytearray(heap_size)
+    for _ in range(decoys):
+        position = rng.randrange(0, heap_size - 8) & ~7
+        heap[position:position + 8] = pointer if rng.random() < 0.5 else struct.pack("<f", -60.0) * 2
+    structure_offset = rng.randrange(0, heap_size - 0x100) & ~0xF
+    heap[structure_offset:structure_offset + 8] = pointer
+    heap[structure_offset + pointer_spacing:structure_offset + pointer_spacing + 8] = pointer
+    seconds_offset_address = heap_base + structure_offset + pointer_spacing + field_offset
+    struct.pack_into("<f", heap, structure_offset + pointer_spacing + field_offset, seconds_offset)
+
+    memory = SyntheticBackend(base_address, image, {heap_base: heap})
+    return memory, FakeClockEvents(memory, seconds_offset_address), seconds_offset_address
@@ -0,0 +1,109 @@
+#pylint: disable=line-too-long, missing-function-docstring
+
+''' Scanning and bulk-reading FlightSimulator2024.exe's memory, e.g. for the pointers to the weather/time structure. '''
+
+# pymem's pattern_scan_all walks every page of the process (tens of GB for the sim), for one pattern at a time.
+# Instead, the MemoryBackend enumerates the committed regions once, keeping only private read/write ones of a plausible
+# size (the heap, where the structure lives). Those are split into chunks that are read and searched on a thread pool, for
+# every pointer in the same pass. Pointers are 8-byte aligned, so each chunk is compared as an array of uint64s with
+# NumPy, which (like ReadProcessMemory) releases the GIL, so the chunks really are searched in parallel. Floats are
+# scanned for the same way, and reading back many candidate addresses reads each cluster of them in one go.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+SCAN_CHUNK_SIZE = 0x40_0000
+DEFAULT_SCAN_WORKERS = min(8, os.cpu_count() or 1)
+MAX_READ_GAP = 0x1_0000
+MAX_READ_SPAN = 0x20_0000
+
+def split_regions(regions, chunk_size=SCAN_CHUNK_SIZE):
+    ''' (start, length) chunks of the regions, at most `chunk_size` long. '''
+    return [(base + offset, min(chunk_size, size - offset)) for base, size in regions for offset in range(0, size, chunk_size)]
+
+def scan_for_values(read_bytes, regions, values, dtype, max_workers=DEFAULT_SCAN_WORKERS):
+    ''' Every address in `regions`, aligned to the size of `dtype`, that holds one of `values`. Returns (addresses, values
+        found there) as sorted NumPy arrays. `read_bytes(address, length)` reads the process' memory, e.g. a
+        MemoryBackend's read_bytes. '''
+    import numpy as np # pylint: disable=import-outside-toplevel
+
+    dtype = np.dtype(dtype)
+    targets = np.array(list(values), dtype=dtype)
+
+    def scan_chunk(start, length):
+        try:
+            data = read_bytes(start, length)
+        except Exception: # pylint: disable=broad-except
+            return None # Freed or reprotected since the regions were enumerated
+        chunk_values = np.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+        indexes = np.flatnonzero(np.isin(chunk_values, targets))
+        return start + indexes.astype(np.uint64) * dtype.itemsize, chunk_values[indexes]
+
+    found_addresses = [np.empty(0, dtype=np.uint64)]
+    found_values = [np.empty(0, dtype=dtype)]
+    if len(targets):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for matches in executor.map(lambda chunk: scan_chunk(*chunk), split_regions(regions)):
+                if matches is not None:
+                    found_addresses.append(matches[0])
+                    found_values.append(matches[1])
+    addresses = np.concatenate(found_addresses)
+    order = np.argsort(addresses, kind="stable")
+    return addresses[order], np.concatenate(found_values)[order]
+
+def scan_for_pointers(read_bytes, regions, pointers, max_workers=DEFAULT_SCAN_WORKERS):
+    ''' Every 8-byte aligned address in `regions` that holds one of `pointers`, as {pointer: sorted addresses}. '''
+    found = {pointer: [] for pointer in pointers}
+    addresses, values = scan_for_values(read_bytes, regions, found, "<u8", max_workers)
+    for address, pointer in zip(addresses.tolist(), values.tolist()):
+        found[pointer].append(address)
+    return found
+
+def read_values(read_scatter, addresses, dtype, max_gap=MAX_READ_GAP, max_span=MAX_READ_SPAN):
+    ''' The `dtype` value at each of `addresses`, as (values, readable) NumPy arrays in the same order. Nearby addresses
+        are read together, in spans of at most `max_span` bytes, and all the spans are read with one
+        `read_scatter(spans)` call (e.g. a MemoryBackend's read_scatter), so there's a read per cluster rather than per
+        address. '''
+    import numpy as np # pylint: disable=import-outside-toplevel
+
+    dtype = np.dtype(dtype)
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    values = np.zeros(len(addresses), dtype=dtype)
+    readable = np.zeros(len(addresses), dtype=bool)
+    if not len(addresses):
+        return values, readable
+    order = np.argsort(addresses, kind="stable")
+    sorted_addresses = addresses[order]
+    # Split wherever the next address is too far away to be worth reading the bytes in between
+    cluster_starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_addresses) > max_gap) + 1, [len(sorted_addresses)])).tolist()
+    # and cap each span, so dense clusters (e.g. thousands of -60s) don't turn into one huge read on every poll
+    span_indexes = []
+    for first, last in zip(cluster_starts[:-1], cluster_starts[1:]):
+        while first < last:
+            end = first + int(np.searchsorted(sorted_addresses[first:last], sorted_addresses[first] + max(max_span - dtype.itemsize, 0), side="right"))
+            span_indexes.append((first, end))
+            first = end
+    spans = [(int(sorted_addresses[first]), int(sorted_addresses[last - 1] - sorted_addresses[first]) + dtype.itemsize) for first, last in span_indexes]
+    byte_offsets = np.arange(dtype.itemsize)
+    unread = []
+    for (first, last), (span_start, _), data in zip(span_indexes, spans, read_scatter(spans)):
+        if data is None:
+            unread.append(order[first:last])
+            continue
+        offsets = (sorted_addresses[first:last] - span_start).astype(np.intp)
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        values[order[first:last]] = buffer[offsets[:, None] + byte_offsets].view(dtype).ravel()
+        readable[order[first:last]] = True
+    if unread and max_gap > 0:
+        # The span may have crossed into memory that can't be read, so read those addresses one by one
+        unread = np.concatenate(unread)
+        values[unread], readable[unread] = read_values(read_scatter, addresses[unread], dtype, 0, max_span)
+    return values, readable
+
+def find_pointer_pairs(addresses, spacing):
+    ''' The (first, second) pairs of sorted `addresses` that are exactly `spacing` apart. '''
+    import numpy as np # pylint: disable=import-outside-toplevel
+
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    firsts = np.flatnonzero(np.diff(addresses) == spacing)
+    return list(zip(addresses[firsts].tolist(), addresses[firsts + 1].tolist()))
@@ -0,0 +1,117 @@
+#pylint: disable=line-too-long, missing-function-docstring
+
+''' Locating the weather/time structure in FlightSimulator2024.exe's image with byte signatures. '''
+
+# Signatures and known offsets are loaded from signatures.json, so a new sim build can be supported by editing that,
+# without a new release. A signature is either a "string" or an AOB "pattern" of hex bytes with ?? wildcards, e.g.
+#   {"name": "...", "pattern": "48 8D 0D ?? ?? ?? ?? E8 ?? ?? ?? ?? 48 8B", "rel32": 3, "next_instruction": 7}
+# Where it matches is the result, unless "rel32" is given: then the result is the target of the RIP-relative operand at
+# that position in the match (relative to "next_instruction", which defaults to the end of the operand). "adjust" is
+# added to the result either way. The result is an offset into the module, like the "known_offsets".
+# The image is walked once, a cache-sized chunk at a time. Each chunk is searched for the longest literal run (the
+# anchor) of every signature with bytes.find, once per distinct anchor (signatures that share one are searched for
+# together). That's a memchr-speed search per anchor rather than a multi-pattern automaton, which is faster for the
+# handful of signatures there are. Only where an anchor is found is the signature's precompiled full pattern matched.
+
+import json
+import os
+import re
+import struct
+import sys
+
+SIGNATURES_FILE = "signatures.json"
+SIGNATURES_VERSION = 1
+SIGNATURE_CHUNK_SIZE = 0x10_0000
+
+def parse_pattern(pattern):
+    ''' "48 8D ?? 05" -> [0x48, 0x8D, None, 0x05] '''
+    return [None if token.strip("?") == "" else int(token, 16) for token in pattern.split()]
+
+class Signature:
+    def __init__(self, name, pattern, rel32=None, next_instruction=None, adjust=0):
+        self.name = name
+        self.pattern = pattern
+        self.rel32 = rel32
+        self.next_instruction = next_instruction if next_instruction is not None else (rel32 + 4 if rel32 is not None else None)
+        self.adjust = adjust
+        self.regex = re.compile(b"".join(b"." if x is None else re.escape(bytes([x])) for x in pattern), re.DOTALL)
+
+        # The longest run without wildcards
+        self.anchor = b""
+        self.anchor_offset = 0
+        run_start = 0
+        for i, x in enumerate(pattern + [None]):
+            if x is not None:
+                continue
+            if i - run_start > len(self.anchor):
+                self.anchor = bytes(pattern[run_start:i])
+                self.anchor_offset = run_start
+            run_start = i + 1
+        if not self.anchor:
+            raise ValueError(f"Signature {name} has no literal bytes")
+
+    @classmethod
+    def from_dict(cls, entry):
+        if "string" in entry:
+            pattern = list(entry["string"].encode("utf8"))
+        else:
+            pattern = parse_pattern(entry["pattern"])
+        return cls(entry["name"], pattern, entry.get("rel32"), entry.get("next_instruction"), int(str(entry.get("adjust", 0)), 0))
+
+    def resolve(self, image, match_offset):
+        ''' The module offset a match at `match_offset` points to. '''
+        if self.rel32 is None:
+            return match_offset + self.adjust
+        displacement = struct.unpack_from("<i", image, match_offset + self.rel32)[0]
+        return match_offset + self.next_instruction + displacement + self.adjust
+
+class SignatureSet:
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+        self.by_anchor = {}
+        for signature in self.signatures:
+            self.by_anchor.setdefault(signature.anchor, []).append(signature)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def scan(self, image, chunk_size=SIGNATURE_CHUNK_SIZE):
+        ''' [(signature, module offset)] for every match in `image`, in signature order, then address order. '''
+        matches = {signature.name: [] for signature in self.signatures}
+        for chunk_start in range(0, len(image), chunk_size):
+            chunk_end = min(chunk_start + chunk_size, len(image))
+            for anchor, signatures in self.by_anchor.items():
+                # Anchors that start in this chunk, even if they end in the next one
+                search_end = min(chunk_end + len(anchor) - 1, len(image))
+                position = image.find(anchor, chunk_start, search_end)
+                while position != -1:
+                    for signature in signatures:
+                        match_offset = position - signature.anchor_offset
+                        if match_offset >= 0 and signature.regex.match(image, match_offset):
+                            matches[signature.name].append(match_offset)
+                    position = image.find(anchor, position + 1, search_end)
+        results = []
+        for signature in self.signatures:
+            for match_offset in matches[signature.name]:
+                try:
+                    results.append((signature, signature.resolve(image, match_offset)))
+                except struct.error:
+                    continue # The operand runs past the end of the image
+        return results
+
+def get_signatures_path():
+    ''' signatures.json next to the bundled exe, or else next to this script. '''
+    signatures_path = os.path.join(os.path.abspath(os.path.dirname(sys.executable)), SIGNATURES_FILE)
+    if not os.path.exists(signatures_path):
+        signatures_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SIGNATURES_FILE)
+    return signatures_path
+
+def load_signatures(path=None):
+    ''' The SignatureSet and the known (name, offset) pairs from signatures.json. '''
+    with open(path or get_signatures_path(), 'r', encoding='utf8') as f:
+        data = json.load(f)
+    if data.get("version") != SIGNATURES_VERSION:
+        raise ValueError(f"Unsupported signatures version: {data.get('version')}")
+    signatures = SignatureSet(Signature.from_dict(x) for x in data.get("signatures", []))
+    known_offsets = [(x["name"], int(str(x["offset"]), 0)) for x in data.get("known_offsets", [])]
+    return signatures, known_offsets
@@ -0,0 +1,61 @@
+#pylint: disable=line-too-long, missing-function-docstring
+
+''' Benchmarks the seconds offset discovery, against a synthetic FlightSimulator2024 image or a live Linux process. '''
+
+# With no --pid, a synthetic image is built (build_fake_flightsim) and the whole discovery runs against it: the signature
+# search, the pointer scan and verification (with fake clock events), then the event-driven fallback on its own.
+# With --pid (e.g. the sim under Proton), there's no way to fire the clock events, so only the scans are timed.
+
+import argparse
+from time import perf_counter
+
+from memory_backends import LinuxBackend, build_fake_flightsim
+from memory_scan import scan_for_pointers, scan_for_values
+from sim_time_rate_adjuster_procmem import find_seconds_offset_address, find_seconds_offset_address_via_events, get_candidate_offsets
+
+def timed(name, function, *args):
+    start = perf_counter()
+    result = function(*args)
+    print(f"{name:<24} {(perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Sim Time Rate Adjuster's offset discovery.")
+    parser.add_argument("--pid", type=int, default=None, help="Scan this Linux process instead of a synthetic image")
+    parser.add_argument("--process", type=str, default=None, help="Scan the Linux process running this exe, e.g. FlightSimulator2024.exe")
+    parser.add_argument("--image_mb", type=int, default=64, help="Size of the synthetic module image")
+    parser.add_argument("--heap_mb", type=int, default=256, help="Size of the synthetic heap")
+    parser.add_argument("--decoys", type=int, default=1000, help="Lone pointers and -60s scattered over the synthetic heap")
+    parser.add_argument("--latency", type=float, default=0.03, help="Seconds the fake clock events take to apply")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pid = args.pid
+    if pid is None and args.process:
+        pid = LinuxBackend.find_pid(args.process)
+        if pid is None:
+            parser.error(f"{args.process} isn't running")
+
+    print("=====================================")
+    if pid is not None:
+        memory = LinuxBackend(pid)
+        print(f"Process {pid}, module at 0x{memory.base_address:X} (0x{memory.image_size:X} bytes)")
+        regions = timed("regions", memory.get_regions)
+        print(f"{len(regions)} regions, {sum(size for _, size in regions) / 2**20:,.0f} MiB")
+        offsets = timed("signatures", get_candidate_offsets, memory) if memory.image_size else []
+        found = timed("pointer scan", scan_for_pointers, memory.read_bytes, regions, [memory.base_address + x for x in offsets])
+        print(f"{sum(len(x) for x in found.values())} pointers found")
+        found = timed("float scan", scan_for_values, memory.read_bytes, regions, [-60.0], "<f4")[0]
+        print(f"{len(found)} -60s found")
+        return
+
+    memory, events, seconds_offset_address = timed("build image", build_fake_flightsim, args.image_mb * 2**20, args.heap_mb * 2**20, args.seed, 0x20, 0x34, 0.0, args.decoys)
+    events.latency = args.latency
+    offsets = timed("signatures", get_candidate_offsets, memory)
+    address = timed("scan and verify", find_seconds_offset_address, memory, offsets, events)[0]
+    print(f"Found 0x{address:X}, expected 0x{seconds_offset_address:X}")
+    address = timed("event fallback", find_seconds_offset_address_via_events, memory, events)
+    print(f"Found 0x{address:X}, expected 0x{seconds_offset_address:X}")
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,19 @@
 import ctypes
 import logging
 import os
-import re
-import struct
 import subprocess
 import sys
 import threading
 from time import sleep, time
 
-from numpy import float32
-import psutil
-import pymem # type: ignore
-from SimConnect import SimConnect, AircraftRequests, AircraftEvents
-
 import constants
+from address_cache import get_build_key, load_address_recipe, save_address_recipe
+from memory_backends import PymemBackend
+from memory_scan import find_pointer_pairs, read_values, scan_for_pointers, scan_for_values
+from signatures import SIGNATURES_FILE, load_signatures
+
+# numpy, psutil, pymem and SimConnect are only imported where they're needed, so that the banner (and the UI, which
+# imports this module for its shared state) come up without waiting on them.
 
 # Shared State Object
 backend_state = {
@@ -34,6 +34,8 @@ backend_state = {
     "autoapp_enabled": False
 }
 state_lock = threading.Lock()
+# Wakes the monitor loop up early, e.g. when the sim pushes a new rate, or the UI wants a state change
+wake_event = threading.Event()
 
 def update_state(key, value):
     with state_lock:
@@ -48,48 +50,187 @@ log("=====================================")
 log(f"MSFS2024 Sim Time Rate Adjuster v{constants.VERSION}")
 log("=====================================")
 
-# Hardcoded offset that stores the seconds offset from the real world time.
-# This is quite likely to break in future MSFS updates.
-HARDCODED_OFFSETS = [
-    ("MSStore_SU1", 0x74fd5f8),
-    ("MSStore_Retail", 0x76f7728),
-
-    ("Steam_SU1", 0x776ddf8),
-    ("Steam_Retail", 0x79670b8)
-]
+# The offsets of the structure that stores the seconds offset from the real world time, known for past builds, and the
+# signatures that find it in new ones, are in signatures.json, so they can be updated without a new release.
 TRY_HARDCODED_OFFSETS_FIRST = True
 POINTER_TO_WEATHER_STRUCT_SPACING = 0x20
 SECONDS_OFFSET_VALUE_OFFSET_FROM_SECOND_POINTER = 0x34
 SLEEP_TIME_AFTER_SIMCONNECT_EVENT = 0.5
 REFRESH_INTERVAL = 0.25
+IDLE_REFRESH_INTERVAL = 1.0
+# Read from the sim in a single request, pushed as soon as any of them changes. More can be added here at no extra
+# round-trip, and are then read as e.g. sim_data_request.outData.ZULU_TIME (only numeric ones)
+SIMCONNECT_VARIABLES = ["SIMULATION_RATE", "IS_SLEW_ACTIVE"]
+# Only shown in the UI, and changing every frame, so read in a second request pushed once a second, e.g. "ZULU_TIME"
+SIMCONNECT_DISPLAY_VARIABLES = ["ABSOLUTE_TIME"]
+
+# What verification does to the clock, and how many seconds each step moves a true seconds offset by
+VERIFICATION_STEPS = [("CLOCK_MINUTES_DEC", -60), ("CLOCK_MINUTES_DEC", -120), ("CLOCK_MINUTES_INC", -60), ("CLOCK_MINUTES_INC", 0)]
+VERIFICATION_POLL_INTERVAL = 0.01
+VERIFICATION_TIMEOUT = 1.0
+# Once something matches, how long (and for how many unchanged polls) to keep polling before trusting the matches
+VERIFICATION_SETTLE_TIME = 0.1
+VERIFICATION_SETTLE_POLLS = 2
+
+def wait_for_expected_values(memory, addresses, expected):
+    ''' Poll `addresses` until they hold their `expected` values, or the timeout. Returns a mask of the addresses that
+        hold their value. A decoy can happen to match before the sim has applied the event, so after the first match
+        polling goes on until the matches have settled: unchanged for VERIFICATION_SETTLE_POLLS polls, and at least
+        VERIFICATION_SETTLE_TIME after the first one. '''
+    import numpy as np # pylint: disable=import-outside-toplevel
+
+    deadline = time() + VERIFICATION_TIMEOUT
+    first_match_time = None
+    last_matched = None
+    unchanged_polls = 0
+    while True:
+        values, readable = read_values(memory.read_scatter, addresses, "<f4")
+        matched = readable & (values.astype("f8") == expected)
+        now = time()
+        if matched.any():
+            if first_match_time is None:
+                first_match_time = now
+            unchanged_polls = unchanged_polls + 1 if last_matched is not None and np.array_equal(matched, last_matched) else 0
+            if unchanged_polls >= VERIFICATION_SETTLE_POLLS and now - first_match_time >= VERIFICATION_SETTLE_TIME:
+                return matched
+        last_matched = matched
+        if now >= deadline:
+            return matched
+        sleep(VERIFICATION_POLL_INTERVAL)
+
+def verify_candidates(memory, aircraft_events, addresses, baselines, steps=None, applied_change=0):
+    ''' Fire each step's event once for all candidate `addresses`, keeping those whose value (from `baselines`, one per
+        address or one for all) changes by the step's amount. `applied_change` is how far the clock has already been
+        moved from the baselines. Returns the candidates that followed every step, in order. If none did, the clock is
+        put back the way it was (up to `applied_change`). '''
+    import numpy as np # pylint: disable=import-outside-toplevel
+
+    steps = VERIFICATION_STEPS if steps is None else steps
+    events = {name: aircraft_events.find(name) for name in ["CLOCK_MINUTES_DEC", "CLOCK_MINUTES_INC"]}
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    baselines = np.zeros(len(addresses)) + np.asarray(baselines, dtype="f8")
+    minutes_changed = 0
+    last_change = applied_change
+    for event_name, change in steps:
+        # Only candidates that hold what they should right before the event can tell anything from it
+        values, readable = read_values(memory.read_scatter, addresses, "<f4")
+        unchanged = readable & (values.astype("f8") == baselines + last_change)
+        addresses = addresses[unchanged]
+        baselines = baselines[unchanged]
+        if not len(addresses):
+            break
+        last_change = change
+        events[event_name](1)
+        minutes_changed += 1 if event_name == "CLOCK_MINUTES_INC" else -1
+        matched = wait_for_expected_values(memory, addresses, baselines + change)
+        addresses = addresses[matched]
+        baselines = baselines[matched]
+        if not len(addresses):
+            break
+    if not len(addresses):
+        undo_event = events["CLOCK_MINUTES_INC" if minutes_changed < 0 else "CLOCK_MINUTES_DEC"]
+        for _ in range(abs(minutes_changed)):
+            undo_event(1)
+    return addresses.tolist()
+
+def get_candidate_offsets(memory):
+    ''' The module offsets the weather/time structure's pointers might point to, most likely first. '''
+    try:
+        signatures, known_offsets = load_signatures()
+    except (OSError, ValueError, KeyError) as ex:
+        log(f"Could not load {SIGNATURES_FILE}: {ex}")
+        return []
+
+    offsets = []
+    if TRY_HARDCODED_OFFSETS_FIRST:
+        msfs_vendor = "MSStore"
+        if memory.process_path and 'microsoft.limitless' not in memory.process_path.lower():
+            msfs_vendor = "Steam"
+        log(f"Detected MSFS Vendor: {msfs_vendor}")
+        offsets.extend(offset for name, offset in known_offsets if name.startswith(msfs_vendor))
+
+    # read the entire FlightSimulator2024.exe module memory
+    log(f"Searching the module memory for {len(signatures)} signatures...")
+    module_memory = memory.read_bytes(memory.base_address, memory.image_size)
+    for signature, offset in signatures.scan(module_memory):
+        log(f"Signature {signature.name} matched, offset: 0x{offset:X}")
+        if offset not in offsets:
+            offsets.append(offset)
+    return offsets
+
+def find_seconds_offset_address(memory, offsets, aircraft_events, pointer_spacing=POINTER_TO_WEATHER_STRUCT_SPACING, field_offset=SECONDS_OFFSET_VALUE_OFFSET_FROM_SECOND_POINTER):
+    ''' Scan the process memory for the pointers to every candidate offset in one pass, then verify the candidates in
+        order. Returns the verified seconds offset address and the offset that led to it, or (0x0, None). '''
+    pointers = [memory.base_address + offset for offset in offsets]
+
+    # Scan the process memory for all of the addresses at once
+    log("Scanning process memory for the address...")
+    scan_start = time()
+    try:
+        regions = memory.get_regions()
+        found = scan_for_pointers(memory.read_bytes, regions, pointers)
+    except memory.errors:
+        return 0x0, None
+    log(f"Scanned {len(regions)} regions ({sum(size for _, size in regions) / 2**20:,.0f} MiB) in {time() - scan_start:.2f} seconds")
+
+    # Verify the candidates of every offset together
+    candidates = {}
+    for offset, pointer in zip(offsets, pointers):
+        log()
+        log(f"Trying offset: 0x{offset:X}")
+        log(f"Final address: 0x{pointer:X}")
+
+        # This is a list of addresses where the pointer was found
+        found_addresses = found[pointer]
+        for address in found_addresses:
+            log(f"Found at: {address:X}")
+        if found_addresses:
+            log()
 
-def verify_seconds_offset_address(seconds_offset_address, pm, aircraft_events):
-    seconds_offset = pm.read_float(seconds_offset_address)
+        # Find the two instances that are 0x20 apart
+        for first, second in find_pointer_pairs(found_addresses, pointer_spacing):
+            log(f"Found base combo at: 0x{first:X} and 0x{second:X}")
+            candidates.setdefault(second + field_offset, offset)
+
+    addresses = list(candidates)
+    baselines, readable = read_values(memory.read_scatter, addresses, "<f4")
+    if not readable.any():
+        return 0x0, None
+    log(f"Verifying {int(readable.sum())} candidates...")
+    verify_start = time()
+    verified = verify_candidates(memory, aircraft_events, [x for x, ok in zip(addresses, readable.tolist()) if ok], baselines[readable])
+    if not verified:
+        log(f"Verification failed ({time() - verify_start:.2f} seconds)")
+        return 0x0, None
+    log(f"Verification successful ({time() - verify_start:.2f} seconds)")
+    return verified[0], candidates[verified[0]]
+
+def find_seconds_offset_address_via_events(memory, aircraft_events):
+    ''' Find the seconds offset by moving the clock, assuming it's at real time (0). Returns the address, or 0x0. '''
     clock_minutes_dec_event = aircraft_events.find("CLOCK_MINUTES_DEC")
     clock_minutes_inc_event = aircraft_events.find("CLOCK_MINUTES_INC")
     clock_minutes_dec_event(1)
+    # Nothing to poll yet, the addresses are only found after the event
     sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-    new_seconds_offset = pm.read_float(seconds_offset_address)
-    if new_seconds_offset != seconds_offset - 60:
-        return False
-    clock_minutes_dec_event(1)
-    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-    new_seconds_offset = pm.read_float(seconds_offset_address)
-    if new_seconds_offset != seconds_offset - 120:
-        return False
-    clock_minutes_inc_event(1)
-    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-    new_seconds_offset = pm.read_float(seconds_offset_address)
-    if new_seconds_offset != seconds_offset - 60:
-        return False
-    clock_minutes_inc_event(1)
-    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-    new_seconds_offset = pm.read_float(seconds_offset_address)
-    if new_seconds_offset != seconds_offset:
-        return False
-    return True
+    found_addresses = []
+    try:
+        scan_start = time()
+        found_addresses = scan_for_values(memory.read_bytes, memory.get_regions(), [-60.0], "<f4")[0]
+        log(f"Found {len(found_addresses)} candidates in {time() - scan_start:.2f} seconds")
+    except memory.errors:
+        pass
+    verified = []
+    if len(found_addresses):
+        # The found addresses went from 0 to -60 with the event above, check which follow the rest along
+        verified = verify_candidates(memory, aircraft_events, found_addresses, 0.0, VERIFICATION_STEPS[1:], VERIFICATION_STEPS[0][1])
+    if not verified:
+        clock_minutes_inc_event(1)
+        return 0x0
+    return verified[0]
 
 def handle_autoapp(sim_rate, autoapp_path):
+    import psutil # pylint: disable=import-outside-toplevel
+
     autoapp_exe_name = os.path.basename(autoapp_path)
     autoapp_exe_name_lower = autoapp_exe_name.lower()
 
@@ -119,18 +260,22 @@ def handle_autoapp(sim_rate, autoapp_path):
                 ctypes.windll.kernel32.SetDllDirectoryW(dll_directory)
 
 def main(invoked_from_ui):
+    # pylint: disable=import-outside-toplevel
+    from numpy import float32
+    import pymem # type: ignore
+    from SimConnect import SimConnect, AircraftRequests, AircraftEvents
+    from SimConnect.Enum import SIMCONNECT_PERIOD
+
     logging.basicConfig(level=logging.INFO)
 
     while True:
         # Get the base module address for FlightSimulator2024.exe
         pm = None
-        process_path = None
         printed_waiting_to_start = False
         update_state("connection_status", "Waiting for FlightSimulator2024.exe to start...")
         while True:
             try:
                 pm = pymem.Pymem("FlightSimulator2024.exe")
-                process_path = pm.process_base.filename
                 break
             except pymem.exception.ProcessNotFound:
                 if not printed_waiting_to_start:
@@ -147,7 +292,7 @@ def main(invoked_from_ui):
                 log(f"An error occurred: {ex}")
             sleep(1)
 
-        base_address = pm.base_address
+        memory = PymemBackend(pm)
 
         simconnect = None
         printed_waiting_for_simconnect = False
@@ -184,145 +329,43 @@ def main(invoked_from_ui):
 
         aircraft_events = AircraftEvents(simconnect)
 
-        log(f"Base address: 0x{base_address:X}")
+        log(f"Base address: 0x{memory.base_address:X}")
 
         seconds_offset_address = 0x0
         seconds_offset = 0.0
 
-        while seconds_offset_address == 0x0:
-            if TRY_HARDCODED_OFFSETS_FIRST:
-                msfs_vendor = "MSStore"
-                if process_path and 'microsoft.limitless' not in process_path.lower():
-                    msfs_vendor = "Steam"
-                log(f"Detected MSFS Vendor: {msfs_vendor}")
-                for offset_tuple in HARDCODED_OFFSETS:
-                    if not offset_tuple[0].startswith(msfs_vendor):
-                        continue
-                    offset = offset_tuple[1]
-
-                    log()
-                    log(f"Trying offset: 0x{offset:X}")
-                    final_address = base_address + offset
-                    log(f"Final address: 0x{final_address:X}")
-
-                    # Scan the process memory for that address
-                    log("Scanning process memory for the address...")
-                    try:
-                        found_addresses = pm.pattern_scan_all(re.escape(final_address.to_bytes(8, "little")), return_multiple=True)
-                    except pymem.exception.WinAPIError:
-                        continue
-
-                    # This will return a list of addresses where the pattern was found
-                    for address in found_addresses:
-                        log(f"Found at: {address:X}")
-                    if found_addresses:
-                        log()
-
-                    # Find the two instances that are 0x20 apart
-                    for i in range(len(found_addresses) - 1):
-                        if found_addresses[i + 1] - found_addresses[i] == POINTER_TO_WEATHER_STRUCT_SPACING:
-                            log(f"Found base combo at: 0x{found_addresses[i]:X} and 0x{found_addresses[i + 1]:X}")
-                            potential_seconds_offset_address = found_addresses[i+1] + SECONDS_OFFSET_VALUE_OFFSET_FROM_SECOND_POINTER
-                            if verify_seconds_offset_address(potential_seconds_offset_address, pm, aircraft_events):
-                                log("Verification successful")
-                                seconds_offset_address = potential_seconds_offset_address
-                            else:
-                                log("Verification failed")
-                                continue
-                            log(f"Seconds offset address: 0x{seconds_offset_address:X}")
-                            seconds_offset = pm.read_float(seconds_offset_address)
-                            log(f"Current seconds offset: {int(seconds_offset)}")
-                            break
-                    if seconds_offset_address != 0x0:
-                        break
+        # Try what worked last time on this build first
+        build_key = get_build_key(memory.process_path, memory.read_bytes(memory.base_address, 0x1000))
+        recipe = load_address_recipe(build_key)
+        if recipe is not None:
+            log(f"Trying the cached offset for this build: 0x{recipe['module_offset']:X}")
+            seconds_offset_address = find_seconds_offset_address(memory, [recipe["module_offset"]], aircraft_events, recipe["pointer_spacing"], recipe["field_offset"])[0]
+            if seconds_offset_address != 0x0:
+                log(f"Seconds offset address: 0x{seconds_offset_address:X}")
+                seconds_offset = memory.read_float(seconds_offset_address)
+                log(f"Current seconds offset: {int(seconds_offset)}")
+            else:
+                log("The cached offset didn't work, scanning...")
 
-            if seconds_offset_address == 0x0:
-                # read the entire FlightSimulator2024.exe module memory
-                log()
-                log("Searching for the magic string in the module memory...")
-                module_memory = pm.read_bytes(base_address, pm.process_base.SizeOfImage)
-                lookup_string = br'Weather\Presets'
-                offset = module_memory.find(lookup_string)
-                if offset != -1:
-                    offset -= 8
-                    log(f"Trying offset: 0x{offset:X}")
-                    final_address = base_address + offset
-                    log(f"Final address: 0x{final_address:X}")
-
-                    # Scan the process memory for that address
-                    log("Scanning process memory for the address...")
-                    try:
-                        found_addresses = pm.pattern_scan_all(re.escape(final_address.to_bytes(8, "little")), return_multiple=True)
-                    except pymem.exception.WinAPIError:
-                        found_addresses = []
-
-                    if found_addresses:
-                        for address in found_addresses:
-                            log(f"Found at: {address:X}")
-                        log()
-
-                    # Find the two instances that are 0x20 apart
-                    for i in range(len(found_addresses) - 1):
-                        if found_addresses[i + 1] - found_addresses[i] == POINTER_TO_WEATHER_STRUCT_SPACING:
-                            log(f"Found base combo at: 0x{found_addresses[i]:X} and 0x{found_addresses[i + 1]:X}")
-                            potential_seconds_offset_address = found_addresses[i+1] + SECONDS_OFFSET_VALUE_OFFSET_FROM_SECOND_POINTER
-                            if verify_seconds_offset_address(potential_seconds_offset_address, pm, aircraft_events):
-                                log("Verification successful")
-                                seconds_offset_address = potential_seconds_offset_address
-                            else:
-                                log("Verification failed")
-                                continue
-                            log(f"Seconds offset address: 0x{seconds_offset_address:X}")
-                            seconds_offset = pm.read_float(seconds_offset_address)
-                            log(f"Current seconds offset: {int(seconds_offset)}")
-                            break
+        while seconds_offset_address == 0x0:
+            offsets = get_candidate_offsets(memory)
+            seconds_offset_address, offset = find_seconds_offset_address(memory, offsets, aircraft_events)
+            if seconds_offset_address != 0x0:
+                save_address_recipe(build_key, offset, POINTER_TO_WEATHER_STRUCT_SPACING, SECONDS_OFFSET_VALUE_OFFSET_FROM_SECOND_POINTER)
+                log(f"Seconds offset address: 0x{seconds_offset_address:X}")
+                seconds_offset = memory.read_float(seconds_offset_address)
+                log(f"Current seconds offset: {int(seconds_offset)}")
 
             if seconds_offset_address == 0x0:
                 log()
                 log("Could not find the seconds offset address using quick methods, attempting to detect offset via events.")
                 log("This requires you to be currently using real time in-sim, otherwise this method will fail.")
                 log("Please wait...")
-                clock_minutes_dec_event = aircraft_events.find("CLOCK_MINUTES_DEC")
-                clock_minutes_inc_event = aircraft_events.find("CLOCK_MINUTES_INC")
-                clock_minutes_dec_event(1)
-                sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                found_addresses = []
-                try:
-                    byte_array = bytearray(struct.pack("<f", -60))
-                    regex_pattern = re.escape(byte_array)
-                    found_addresses = pm.pattern_scan_all(regex_pattern, return_multiple=True)
-                except pymem.exception.WinAPIError:
-                    pass
-                if found_addresses:
-                    clock_minutes_dec_event(1)
-                    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                    # Check which of the found addresses now contain a float -120
-                    for address in found_addresses:
-                        try:
-                            if pm.read_float(address) == -120:
-                                # Let's double confirm by incrementing twice and checking that the value changes to -60 and 0 each time
-                                clock_minutes_inc_event(1)
-                                sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                                if pm.read_float(address) != -60:
-                                    clock_minutes_dec_event(1)
-                                    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                                    continue
-                                clock_minutes_inc_event(1)
-                                sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                                if pm.read_float(address) != 0:
-                                    clock_minutes_dec_event(2)
-                                    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
-                                    continue
-                                seconds_offset_address = address
-                                log(f"Seconds offset address: 0x{seconds_offset_address:X}")
-                                seconds_offset = pm.read_float(seconds_offset_address)
-                                log(f"Current seconds offset: {int(seconds_offset)}")
-                                break
-                        except pymem.exception.MemoryReadError:
-                            continue
-                else:
-                    clock_minutes_inc_event(1)
-                    sleep(SLEEP_TIME_AFTER_SIMCONNECT_EVENT)
+                seconds_offset_address = find_seconds_offset_address_via_events(memory, aircraft_events)
+                if seconds_offset_address != 0x0:
+                    log(f"Seconds offset address: 0x{seconds_offset_address:X}")
+                    seconds_offset = memory.read_float(seconds_offset_address)
+                    log(f"Current seconds offset: {int(seconds_offset)}")
 
             if seconds_offset_address == 0x0:
                 log()
@@ -333,11 +376,16 @@ def main(invoked_from_ui):
         log("Initialization complete.")
         log("Monitoring for sim rate and pause state changes...")
 
+        # The rate and slew state are read in one data definition, which the sim pushes whenever either changes (and
+        # pause state changes come as system events), so the loop below wakes up for those as they happen, instead of
+        # polling. The display-only variables come once a second, without waking the loop.
         aircraft_requests = AircraftRequests(simconnect, _time=0)
-
-        absolute_time = aircraft_requests.get("ABSOLUTE_TIME")
-        if absolute_time is not None:
-            update_state("absolute_time", absolute_time)
+        sim_data_request = aircraft_requests.group(*SIMCONNECT_VARIABLES)
+        display_data_request = aircraft_requests.group(*SIMCONNECT_DISPLAY_VARIABLES)
+        wake_event.clear()
+        simconnect.on_system_event = lambda _event_id: wake_event.set()
+        simconnect.subscribe_data(sim_data_request, callback=lambda _request: wake_event.set())
+        simconnect.subscribe_data(display_data_request, SIMCONNECT_PERIOD.SIMCONNECT_PERIOD_SECOND, False, lambda request: update_state("absolute_time", request.outData.ABSOLUTE_TIME))
 
         update_state("seconds_offset", int(seconds_offset))
         update_state("simconnect_status", f"OK: {simconnect.ok} - Paused: {simconnect.paused}")
@@ -351,7 +399,10 @@ def main(invoked_from_ui):
 
         try:
             while True:
-                sleep(REFRESH_INTERVAL)
+                # While the sim runs at 1x, the offset doesn't need to move, so only wake up for changes (and now and
+                # then for the status). Otherwise, keep moving it every REFRESH_INTERVAL.
+                wake_event.wait(IDLE_REFRESH_INTERVAL if cur_sim_rate == 1.0 and abs(diff) < 1 else REFRESH_INTERVAL)
+                wake_event.clear()
                 #log("=====================================")
 
                 force_state_change = None
@@ -374,7 +425,7 @@ def main(invoked_from_ui):
                     elif force_state_change == "reset":
                         log("Resetting to custom seconds offset...")
                         seconds_offset = forced_seconds_offset
-                        pm.write_float(seconds_offset_address, float(seconds_offset))
+                        memory.write_float(seconds_offset_address, float(seconds_offset))
                         log(f"Setting new seconds offset: {int(seconds_offset)}")
                         update_state("seconds_offset", int(seconds_offset))
                     update_state("force_state_change", None)
@@ -385,24 +436,18 @@ def main(invoked_from_ui):
 
                 update_state("simconnect_status", f"OK: {simconnect.ok} - Paused: {simconnect.paused}")
 
-                absolute_time = aircraft_requests.get("ABSOLUTE_TIME")
-                if absolute_time is not None:
-                    update_state("absolute_time", absolute_time)
-
                 last_sim_rate = cur_sim_rate
                 additional_state = ""
                 if simconnect.paused:
                     cur_sim_rate = 0.0
                     additional_state = " (Paused)"
                 else:
-                    is_slew_active = aircraft_requests.get("IS_SLEW_ACTIVE")
-                    if is_slew_active is not None and is_slew_active:
+                    sim_data = sim_data_request.outData
+                    if sim_data is not None and sim_data.IS_SLEW_ACTIVE:
                         cur_sim_rate = 0.0
                         additional_state = " (Slew Mode Active)"
-                    else:
-                        sim_rate = aircraft_requests.get("SIMULATION_RATE")
-                        if sim_rate is not None:
-                            cur_sim_rate = sim_rate
+                    elif sim_data is not None:
+                        cur_sim_rate = sim_data.SIMULATION_RATE
                 if cur_sim_rate != last_sim_rate:
                     update_state("simulation_rate", cur_sim_rate)
                     cur_sim_rate_str = f"{cur_sim_rate:.2f}".rstrip("0").rstrip(".")
@@ -414,7 +459,12 @@ def main(invoked_from_ui):
                         if autoapp_enabled and autoapp_path is not None and os.path.exists(autoapp_path):
                             threading.Thread(target=handle_autoapp, args=(cur_sim_rate, autoapp_path), daemon=True).start()
 
-                seconds_elapsed_this_time_adjusted_for_sim_rate = seconds_elapsed_this_time * cur_sim_rate
+                if cur_sim_rate is None:
+                    continue # The sim hasn't sent the rate yet
+
+                # The time since the last iteration passed at the rate from before any change that woke us up
+                rate_since_last_time = last_sim_rate if last_sim_rate is not None else cur_sim_rate
+                seconds_elapsed_this_time_adjusted_for_sim_rate = seconds_elapsed_this_time * rate_since_last_time
 
                 seconds_elapsed += seconds_elapsed_this_time
                 seconds_elapsed_adjusted_for_sim_rate += seconds_elapsed_this_time_adjusted_for_sim_rate
@@ -422,10 +472,10 @@ def main(invoked_from_ui):
                 # How many seconds do we need to add to the in-sim time offset?
                 diff += seconds_elapsed_this_time_adjusted_for_sim_rate - seconds_elapsed_this_time
 
-                seconds_offset = pm.read_float(seconds_offset_address)
+                seconds_offset = memory.read_float(seconds_offset_address)
 
                 while int(abs(diff)) >= 1:
-                    seconds_offset_f32 = float32(pm.read_float(seconds_offset_address))
+                    seconds_offset_f32 = float32(memory.read_float(seconds_offset_address))
                     diff_to_deplete = int(diff)
                     # Check if we can deplete the entire integer part of the diff in one go, accounting for single precision floating point math.
                     if (seconds_offset_f32 + diff_to_deplete).item() != (seconds_offset_f32.item() + diff_to_deplete):
@@ -439,10 +489,10 @@ def main(invoked_from_ui):
                         #prev_diff = diff
                         diff -= diff_to_deplete
                         new_seconds_offset_f32 = seconds_offset_f32 + diff_to_deplete
-                        pm.write_float(seconds_offset_address, new_seconds_offset_f32.item())
+                        memory.write_float(seconds_offset_address, new_seconds_offset_f32.item())
                         #print(f"prev_diff: {prev_diff}, diff_to_deplete: {diff_to_deplete}, diff: {diff}, new_seconds_offset_f32: {new_seconds_offset_f32.item()}")
                         log(f"Setting new seconds offset: {int(new_seconds_offset_f32.item())}")
-                        seconds_offset = pm.read_float(seconds_offset_address)
+                        seconds_offset = memory.read_float(seconds_offset_address)
                         if seconds_offset != new_seconds_offset_f32:
                             log("Failed to set new seconds offset, potential floating point math precision error.")
                     else:
@@ -9,16 +9,16 @@ from tkinter import ttk, scrolledtext, messagebox, filedialog
 from threading import Thread
 from typing import Optional
 
-import humanize
-from tkcalendar import DateEntry  # type: ignore
 import win32event
 import win32api
 
 import constants
-from sim_time_rate_adjuster_procmem import main, backend_state, state_lock
+from sim_time_rate_adjuster_procmem import main, backend_state, state_lock, wake_event
 
 #pylint: disable=line-too-long,missing-function-docstring,missing-class-docstring
 
+# humanize and tkcalendar are imported where they're used, so the window comes up without waiting on them.
+
 def sanitize_path(path):
     return path.replace('/', '\\')
 
@@ -136,6 +136,7 @@ class SimAdjusterUI:
                     self.log_to_console("ERROR: Custom time is only supported for reset operation.")
             else:
                 backend_state['forced_seconds_offset'] = 0
+        wake_event.set()
 
     def toggle_console(self):
         if self.console_visible:
@@ -270,6 +271,8 @@ class SimAdjusterUI:
     has_shown_thread_died_error = False
 
     def update_ui(self):
+        import humanize # pylint: disable=import-outside-toplevel
+
         if not self.backend_thread.is_alive() and not self.has_shown_thread_died_error:
             # Backend thread has exited, a fatal error must have happened
             # Bring up a dialog to inform the user, and exit
@@ -370,6 +373,8 @@ class SimAdjusterUI:
         self.update_button_states(connected)
 
     def open_reset_window(self):
+        from tkcalendar import DateEntry  # type: ignore # pylint: disable=import-outside-toplevel
+
         self.reset_window = tk.Toplevel(self.root)
         reset_window = self.reset_window
         reset_window.withdraw()
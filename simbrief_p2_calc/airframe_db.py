@@ -0,0 +1,133 @@
+""" Known airframes, from airframes.json """
+
+# airframes.json is compiled once into an indexed form (lookups by key and "id", case-insensitive, plus a sorted term
+# list for prefix search) and pickled into the local cache. Later starts load the pickle instead of re-parsing and
+# re-indexing the JSON. The compiled form records the source's SHA-256, and is rebuilt whenever it no longer matches
+# (the hash is only recomputed when the source's size or mtime changed).
+
+import bisect
+import difflib
+import hashlib
+import json
+import os.path
+import pickle
+import re
+import sys
+
+COMPILED_VERSION = 1
+
+def get_airframes_path() -> str:
+    """ airframes.json next to the bundled exe, or else in the current directory. Empty if there's neither. """
+    bundled_exe_dir = os.path.abspath(os.path.dirname(sys.executable))
+    airframes_path = os.path.join(bundled_exe_dir, "airframes.json")
+    if not os.path.exists(airframes_path):
+        airframes_path = "airframes.json"
+    if not os.path.exists(airframes_path):
+        airframes_path = ""
+    return airframes_path
+
+def get_compiled_path(airframes_path : str, cache_dir : str | None = None) -> str:
+    if cache_dir is None:
+        cache_root = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+        cache_dir = os.path.join(cache_root, 'msfs-2024-utils', 'airframe_db')
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(airframes_path)).encode('utf8')).hexdigest()
+    return os.path.join(cache_dir, f"{key}.pickle")
+
+def get_search_terms(key : str, airframe : dict) -> set[str]:
+    terms = {key.lower(), str(airframe.get("id", "")).lower()}
+    terms.update(re.split(r'[\s_\-/]+', key.lower()))
+    terms.discard("")
+    return terms
+
+class AirframeDb:
+    def __init__(self, airframes : dict, source_sha256 : str = ""):
+        self.airframes = airframes
+        self.source_sha256 = source_sha256
+        # Indexes map to positions in self.keys, which keeps the compiled form small and quick to load
+        self.keys = list(airframes)
+        self.by_lower_key = {}
+        self.by_id = {}
+        self.by_lower_id = {}
+        terms = set()
+        for index, (key, airframe) in enumerate(airframes.items()):
+            self.by_lower_key.setdefault(key.lower(), index)
+            if "id" in airframe:
+                self.by_id.setdefault(airframe["id"], index)
+                self.by_lower_id.setdefault(str(airframe["id"]).lower(), index)
+            terms.update((term, index) for term in get_search_terms(key, airframe))
+        # Sorted terms, with the airframe each came from, for prefix search by bisection
+        sorted_terms = sorted(terms)
+        self.terms = [x[0] for x in sorted_terms]
+        self.term_keys = [x[1] for x in sorted_terms]
+
+    def __len__(self):
+        return len(self.airframes)
+
+    def get(self, airframe_id : str) -> dict | None:
+        """ Find an airframe by its key in airframes.json or by its "id" value, exactly first, then ignoring case. """
+        if airframe_id in self.airframes:
+            return self.airframes[airframe_id]
+        index = self.by_id.get(airframe_id)
+        if index is None:
+            index = self.by_lower_key.get(airframe_id.lower())
+        if index is None:
+            index = self.by_lower_id.get(airframe_id.lower())
+        return self.airframes[self.keys[index]] if index is not None else None
+
+    def search(self, query : str, limit : int = 10) -> list[str]:
+        """ Keys of the airframes with a name, word or id starting with `query`, topped up with fuzzy matches. """
+        query = query.lower().strip()
+        if not query:
+            return []
+        matches = []
+        position = bisect.bisect_left(self.terms, query)
+        while position < len(self.terms) and self.terms[position].startswith(query) and len(matches) < limit:
+            key = self.keys[self.term_keys[position]]
+            if key not in matches:
+                matches.append(key)
+            position += 1
+        if len(matches) < limit:
+            for term in difflib.get_close_matches(query, set(self.terms), n=limit, cutoff=0.6):
+                position = bisect.bisect_left(self.terms, term)
+                while position < len(self.terms) and self.terms[position] == term:
+                    key = self.keys[self.term_keys[position]]
+                    if key not in matches:
+                        matches.append(key)
+                    position += 1
+        return matches[:limit]
+
+def save_compiled(compiled_path : str, db : AirframeDb, st : os.stat_result):
+    try:
+        os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+        temp_path = compiled_path + f".{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump({"version": COMPILED_VERSION, "sha256": db.source_sha256, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "db": db}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, compiled_path)
+    except OSError:
+        pass # The compiled form is only an optimization
+
+def load_airframe_db(airframes_path : str, cache_dir : str | None = None) -> AirframeDb:
+    compiled_path = get_compiled_path(airframes_path, cache_dir)
+    try:
+        with open(compiled_path, "rb") as f:
+            compiled = pickle.load(f)
+        # Also check the compiled database has the attributes this version of the class expects
+        if compiled.get("version") != COMPILED_VERSION or set(vars(compiled["db"])) != set(vars(AirframeDb({}))):
+            compiled = None
+    except Exception: # pylint: disable=broad-except
+        compiled = None
+
+    st = os.stat(airframes_path)
+    if compiled and compiled["mtime_ns"] == st.st_mtime_ns and compiled["size"] == st.st_size:
+        return compiled["db"]
+
+    with open(airframes_path, "rb") as f:
+        source_bytes = f.read()
+    source_sha256 = hashlib.sha256(source_bytes).hexdigest()
+    if compiled and compiled["sha256"] == source_sha256:
+        # Touched, but not changed, so only the recorded mtime needs updating
+        db = compiled["db"]
+    else:
+        db = AirframeDb(json.loads(source_bytes), source_sha256)
+    save_compiled(compiled_path, db, st)
+    return db
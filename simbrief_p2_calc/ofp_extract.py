@@ -0,0 +1,188 @@
+""" Pull just the sections the calculators need out of an OFP, without parsing the whole document """
+
+# A SimBrief OFP is mostly navlog, ATC text, NOTAMs, weather and image links, none of which the calculators read.
+# OfpSectionExtractor is fed the raw JSON a chunk at a time, and only tracks the document's structure: strings and
+# brackets are found by a regex (so the scan runs in C), and only the wanted top-level sections are kept and parsed.
+# It's done as soon as every wanted section has been seen, so the rest of the response never has to be read.
+# OFPs saved as XML get the same treatment from OfpXmlSectionExtractor, an incremental (expat) parser that only
+# builds the wanted sections, and discards every other element as soon as it's parsed.
+
+import json
+import re
+import xml.etree.ElementTree as ET
+from typing import Iterable, Optional
+
+# Everything the payload calculators and batch output use
+OFP_SECTIONS = ("params", "aircraft", "origin", "destination", "fuel", "weights")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# At the top level: a string (group 1 is None if it's cut off at the end of the buffer), or a structural character
+TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\]:]')
+# Inside a section: everything up to the next bracket, skipping over complete strings
+SKIP_RE = re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+class OfpSectionExtractor:
+    def __init__(self, sections : Iterable[str] = OFP_SECTIONS):
+        self.wanted = set(sections)
+        self.sections = {}
+        self.buffer = b""
+        self.scan_pos = 0
+        self.depth = 0
+        self.last_string = None
+        self.key = None
+        self.value_start = None
+        self.bytes_read = 0
+
+    @property
+    def done(self) -> bool:
+        return not self.wanted - self.sections.keys()
+
+    def feed(self, chunk : bytes) -> bool:
+        """ Feed the next chunk of the document. Returns True once every wanted section has been found. """
+        self.bytes_read += len(chunk)
+        self.buffer += chunk
+        buffer = self.buffer
+        pos = self.scan_pos
+        while not self.done:
+            if self.depth >= 2:
+                # Inside a section, only brackets matter
+                pos = SKIP_RE.match(buffer, pos).end()
+                if pos >= len(buffer) or buffer[pos] == 0x22: # '"', a string cut off by the end of the chunk
+                    break
+                pos += 1
+                if buffer[pos - 1] in b"{[":
+                    self.depth += 1
+                    continue
+                self.depth -= 1
+                if self.depth == 1:
+                    if self.value_start is not None:
+                        self.sections[self.key] = json.loads(buffer[self.value_start:pos])
+                        self.value_start = None
+                    self.key = None
+                    self.last_string = None
+                continue
+
+            match = TOKEN_RE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = match.group(0)
+            pos = match.end()
+            if token[0] == 0x22: # '"'
+                if match.group(1) is None:
+                    # Cut off by the end of the chunk, so rescan it once there's more
+                    pos = match.start()
+                    break
+                if self.depth == 1:
+                    self.last_string = token
+            elif token == b":":
+                if self.depth == 1 and self.last_string is not None:
+                    self.key = json.loads(self.last_string)
+            elif token in (b"{", b"["):
+                if self.depth == 1 and self.key in self.wanted:
+                    self.value_start = match.start()
+                self.depth += 1
+            else:
+                self.depth -= 1
+
+        # Drop what's been scanned, unless it's part of a section still being collected
+        keep_from = self.value_start if self.value_start is not None else pos
+        self.buffer = buffer[keep_from:]
+        self.scan_pos = pos - keep_from
+        if self.value_start is not None:
+            self.value_start = 0
+        return self.done
+
+def extract_ofp_sections(chunks : Iterable[bytes], sections : Iterable[str] = OFP_SECTIONS) -> dict:
+    """
+    The wanted top-level sections of the OFP in `chunks`. Stops consuming `chunks` once they've all been found.
+    Sections the OFP doesn't have are left out, but a document that ends early raises a ValueError.
+    """
+    extractor = OfpSectionExtractor(sections)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            return extractor.sections
+    if extractor.depth != 0 or extractor.bytes_read == 0:
+        raise ValueError(f"Incomplete OFP JSON, after {extractor.bytes_read} bytes")
+    return extractor.sections
+
+def element_to_value(element : ET.Element):
+    """ Convert an XML OFP element the way SimBrief's JSON has it: text for leaves, dicts (lists for repeats) otherwise. """
+    if len(element) == 0:
+        return element.text or ""
+    value = {}
+    for child in element:
+        child_value = element_to_value(child)
+        if child.tag not in value:
+            value[child.tag] = child_value
+        elif isinstance(value[child.tag], list):
+            value[child.tag].append(child_value)
+        else:
+            value[child.tag] = [value[child.tag], child_value]
+    return value
+
+class OfpXmlSectionExtractor:
+    def __init__(self, sections : Iterable[str] = OFP_SECTIONS):
+        self.wanted = set(sections)
+        self.sections = {}
+        self.parser = ET.XMLPullParser(events=("start", "end"))
+        self.depth = 0
+        self.bytes_read = 0
+
+    @property
+    def done(self) -> bool:
+        return not self.wanted - self.sections.keys()
+
+    def feed(self, chunk : bytes) -> bool:
+        """ Feed the next chunk of the document. Returns True once every wanted section has been found. """
+        self.bytes_read += len(chunk)
+        self.parser.feed(chunk)
+        for event, element in self.parser.read_events():
+            if event == "start":
+                self.depth += 1
+                continue
+            self.depth -= 1
+            if self.depth == 1:
+                if element.tag in self.wanted:
+                    self.sections[element.tag] = element_to_value(element)
+                # Top-level sections are done with once they've ended, don't keep them in the tree
+                element.clear()
+                if self.done:
+                    return True
+        return self.done
+
+    def close(self):
+        self.parser.close()
+
+def extract_ofp_sections_xml(chunks : Iterable[bytes], sections : Iterable[str] = OFP_SECTIONS) -> dict:
+    """ Like extract_ofp_sections, for an OFP in SimBrief's XML format. """
+    extractor = OfpXmlSectionExtractor(sections)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            return extractor.sections
+    try:
+        extractor.close()
+    except ET.ParseError as e:
+        raise ValueError(f"Incomplete OFP XML: {e}") from e
+    return extractor.sections
+
+def read_file_chunks(path : str, chunk_size : int = READ_CHUNK_SIZE):
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+def is_xml_ofp(path : str) -> bool:
+    return path.lower().endswith(".xml")
+
+def load_ofp_sections(path : str, sections : Optional[Iterable[str]] = OFP_SECTIONS) -> dict:
+    """ Load the wanted sections of a saved OFP JSON or XML file, or all of it if `sections` is None. """
+    if is_xml_ofp(path):
+        if sections is None:
+            root = ET.parse(path).getroot()
+            return {child.tag: element_to_value(child) for child in root}
+        return extract_ofp_sections_xml(read_file_chunks(path), sections)
+    if sections is None:
+        with open(path, "r", encoding="utf8") as f:
+            return json.load(f)
+    return extract_ofp_sections(read_file_chunks(path), sections)
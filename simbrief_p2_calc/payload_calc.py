@@ -0,0 +1,185 @@
+""" Figure out max number of passengers and freight for a given simbrief OFP """
+
+# Every passenger brings a checked bag, so each one adds pax_weight + bag_weight to the zero fuel weight, and freight
+# adds its own weight. Block fuel scales with the zero fuel weight (as in the OFP, by zfw_to_block_fuel_ratio), so
+# the takeoff weight limit turns into a second limit on the zero fuel weight. With both limits folded into one,
+# the most freight for any pax count is a closed form, and a single sweep over 0..max_pax gives the exact optimum
+# as well as the whole pax vs. freight trade-off (every row of which is Pareto optimal).
+
+# pylint: disable=line-too-long
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+# Slack for float rounding in the weights, so an exact fit isn't floored down by one
+EPSILON = 1e-6
+
+def null_log(_message : str):
+    pass
+
+@dataclass
+class PayloadInputs:
+    max_zerofuel_weight : float
+    est_zerofuel_weight : float
+    max_takeoff_weight : float
+    est_takeoff_weight : float
+    block_fuel : int
+    cargo_per_pax : float
+    person_weight_per_pax : float
+    pax : int
+    bags : int
+    freight : int
+    cargo : float
+
+    @property
+    def zfw_to_block_fuel_ratio(self) -> float:
+        return self.est_zerofuel_weight / self.block_fuel
+
+    @property
+    def total_zfw_per_pax(self) -> float:
+        return self.person_weight_per_pax + self.cargo_per_pax
+
+    @property
+    def total_tow_per_pax(self) -> float:
+        return self.total_zfw_per_pax + (self.total_zfw_per_pax / self.zfw_to_block_fuel_ratio)
+
+    @property
+    def extra_cargo(self) -> float:
+        return self.cargo - self.freight - self.bags * self.cargo_per_pax
+
+    @property
+    def base_zerofuel_weight(self) -> float:
+        """ The zero fuel weight without any passengers, bags or freight (i.e. including any extra cargo). """
+        return self.est_zerofuel_weight - self.pax * self.person_weight_per_pax - self.bags * self.cargo_per_pax - self.freight
+
+    @property
+    def zerofuel_weight_limit(self) -> float:
+        """ The lower of MZFW, and the zero fuel weight at which the takeoff weight (with its scaled fuel) hits MTOW. """
+        ratio = self.zfw_to_block_fuel_ratio
+        tow_limited_zfw = self.est_zerofuel_weight + (self.max_takeoff_weight - self.est_takeoff_weight) * ratio / (1 + ratio)
+        return min(self.max_zerofuel_weight, tow_limited_zfw)
+
+    @property
+    def limiting_weight(self) -> str:
+        ratio = self.zfw_to_block_fuel_ratio
+        tow_limited_zfw = self.est_zerofuel_weight + (self.max_takeoff_weight - self.est_takeoff_weight) * ratio / (1 + ratio)
+        return "MZFW" if self.max_zerofuel_weight <= tow_limited_zfw else "MTOW"
+
+def payload_inputs_from_ofp(simbrief_ofp : dict) -> PayloadInputs:
+    weights = simbrief_ofp["weights"]
+    fuel = simbrief_ofp["fuel"]
+    return PayloadInputs(
+        max_zerofuel_weight=float(weights["max_zfw"]),
+        est_zerofuel_weight=float(weights["est_zfw"]),
+        max_takeoff_weight=float(weights["max_tow"]),
+        est_takeoff_weight=float(weights["est_tow"]),
+        block_fuel=int(fuel["taxi"]) + int(fuel["enroute_burn"]) + int(fuel["contingency"]) + int(fuel["alternate_burn"]) + int(fuel["reserve"]) + int(fuel["etops"]) + int(fuel["extra"]),
+        cargo_per_pax=float(weights["bag_weight"]),
+        person_weight_per_pax=float(weights["pax_weight"]),
+        pax=int(weights["pax_count_actual"]),
+        bags=int(weights["bag_count_actual"]),
+        freight=int(weights["freight_added"]),
+        cargo=float(weights["cargo"]),
+    )
+
+def log_payload_inputs(inputs : PayloadInputs, log : Callable[[str], None]):
+    log("=================================================")
+    log("Simbrief OFP Info")
+    log("=================================================")
+    log(f"Max zero fuel weight: {int(inputs.max_zerofuel_weight):n}")
+    log(f"Estimated zero fuel weight: {int(inputs.est_zerofuel_weight):n}")
+    log(f"Remaining zero fuel weight: {int(inputs.max_zerofuel_weight - inputs.est_zerofuel_weight):n}")
+    log(f"Block fuel: {inputs.block_fuel:n}")
+    log(f"Zero fuel weight to block fuel ratio: {inputs.zfw_to_block_fuel_ratio:.2f}")
+    log(f"Max takeoff weight: {int(inputs.max_takeoff_weight):n}")
+    log(f"Estimated takeoff weight: {int(inputs.est_takeoff_weight):n}")
+    log(f"Remaining takeoff weight: {int(inputs.max_takeoff_weight - inputs.est_takeoff_weight):n}")
+    log(f"Cargo per pax: {inputs.cargo_per_pax}")
+    log(f"Person weight per pax: {inputs.person_weight_per_pax}")
+    log(f"Total zero fuel weight per pax: {inputs.total_zfw_per_pax:.2f}")
+    log(f"Total takeoff weight per pax: {inputs.total_tow_per_pax:.2f}")
+    log(f"Actual pax: {inputs.pax}")
+    log(f"Actual bags: {inputs.bags}")
+    log(f"Freight: {inputs.freight:n}")
+    log(f"Extra cargo: {math.ceil(inputs.extra_cargo):n}")
+
+@dataclass
+class PayloadSolution:
+    final_pax : int
+    final_freight : int
+    # Whether the plan fits at all. If not, even an empty aircraft is over a weight limit.
+    feasible : bool
+    limiting_weight : str
+    # (pax, max freight) for every feasible pax count, from 0 pax up
+    pareto : List[Tuple[int, int]] = field(default_factory=list)
+
+def max_freight_by_pax(inputs : PayloadInputs, max_pax : int) -> List[int]:
+    """ The most freight that fits with 0, 1, ... max_pax passengers (negative where the pax alone don't fit). """
+    headroom = inputs.zerofuel_weight_limit - inputs.base_zerofuel_weight + EPSILON
+    per_pax = inputs.total_zfw_per_pax
+    return [math.floor(headroom - n * per_pax) for n in range(max_pax + 1)]
+
+def optimize_payload(inputs : PayloadInputs, max_pax : int, desired_pax : Optional[int] = None, desired_freight : Optional[int] = None) -> PayloadSolution:
+    """
+    Exact integer optimum under MZFW, MTOW and max_pax. Without a desired value, pax are maximized first, then freight.
+    With `desired_pax`, freight is maximized for as many of those pax as fit. With `desired_freight`, pax are maximized
+    for that freight, and any weight left over is added as freight.
+    """
+    if desired_pax is not None and desired_freight is not None:
+        raise ValueError("You can't specify both desired_pax and desired_freight")
+
+    max_pax = max(0, int(max_pax))
+    freights = max_freight_by_pax(inputs, max_pax)
+    pareto = [(n, f) for n, f in enumerate(freights) if f >= 0]
+    if not pareto:
+        return PayloadSolution(0, 0, False, inputs.limiting_weight)
+
+    # freights is decreasing in pax, so the feasible pax counts are 0..most_pax
+    most_pax = pareto[-1][0]
+    if desired_freight is not None:
+        pax = next((n for n, f in reversed(pareto) if f >= desired_freight), 0)
+    elif desired_pax is not None:
+        pax = max(0, min(int(desired_pax), most_pax))
+    else:
+        pax = most_pax
+    return PayloadSolution(pax, freights[pax], True, inputs.limiting_weight, pareto)
+
+def log_pareto_table(solution : PayloadSolution, log : Callable[[str], None]):
+    log("=================================================")
+    log("Pax vs. max freight")
+    log("=================================================")
+    for pax, freight in solution.pareto:
+        marker = " <" if pax == solution.final_pax else ""
+        log(f"{pax:>5} {freight:>10n}{marker}")
+
+def calculate_max_payload(simbrief_ofp : dict, max_pax : int, desired_pax : Optional[int] = None, desired_freight : Optional[int] = None, log : Callable[[str], None] = null_log) -> dict:
+    """
+    Work out the final pax and freight for `simbrief_ofp`, either maximizing both, or maximizing freight for
+    `desired_pax`, or maximizing pax for `desired_freight`. The OFP's figures and the outcome are reported through `log`.
+    Returns a dict with "final_pax", "final_freight", "limiting_weight" and the "pareto" table.
+    """
+    inputs = payload_inputs_from_ofp(simbrief_ofp)
+    log_payload_inputs(inputs, log)
+    solution = optimize_payload(inputs, max_pax, desired_pax, desired_freight)
+
+    log("=================================================")
+    log("Calculations")
+    log("=================================================")
+    if not solution.feasible:
+        log(f"Even without any passengers or freight, the plan is over {solution.limiting_weight}")
+    else:
+        log(f"Limited by: {solution.limiting_weight}")
+        log(f"Passengers that fit with baggage: {solution.pareto[-1][0]} (max {max_pax})")
+        if desired_pax is not None and solution.final_pax < desired_pax:
+            log(f"Only {solution.final_pax} of the desired {desired_pax} passengers fit")
+        if desired_freight is not None and solution.final_freight < desired_freight:
+            log(f"The desired freight of {desired_freight:n} doesn't fit, even without passengers")
+    log("=================================================")
+
+    return {
+        "final_pax": solution.final_pax,
+        "final_freight": solution.final_freight,
+        "limiting_weight": solution.limiting_weight,
+        "pareto": solution.pareto,
+    }
@@ -0,0 +1,149 @@
+""" Fetching and caching SimBrief OFPs """
+
+# The latest OFP per username is cached on disk, so trying different pax/freight values against the same plan doesn't
+# refetch it every time. Within the TTL the cached OFP is used as is. After that, it's revalidated with a conditional
+# request where the server supports it, and a new plan is told apart from the cached one by its request id and
+# generation time.
+
+# pylint: disable=line-too-long
+
+import hashlib
+import json
+import os.path
+import re
+import threading
+import time
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+from ofp_extract import OFP_SECTIONS, READ_CHUNK_SIZE, extract_ofp_sections, load_ofp_sections
+
+OFP_CACHE_VERSION = 1
+DEFAULT_OFP_CACHE_TTL_SECONDS = 60
+# Up to this much of a response left unread after the wanted sections is still read, so the connection can be reused
+MAX_DRAIN_SIZE = 256 * 1024
+SIMBRIEF_OFP_URL = "https://www.simbrief.com/api/xml.fetcher.php?username={username}&json=1"
+# Set to e.g. http://127.0.0.1:8780/api/xml.fetcher.php?username={username}&json=1 to fetch from simbrief_stub_server.py
+SIMBRIEF_OFP_URL_ENV = "SIMBRIEF_OFP_URL"
+
+ofp_cache_memory = {}
+ofp_cache_lock = threading.Lock()
+
+def get_ofp_cache_path(username : str) -> str:
+    cache_root = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    safe_username = re.sub(r'[^a-z0-9_.-]', '_', username.lower())
+    # Keep OFPs from a stub server apart from the real ones
+    url = os.getenv(SIMBRIEF_OFP_URL_ENV)
+    if url:
+        safe_username += "-" + hashlib.sha1(url.encode("utf8")).hexdigest()[:8]
+    return os.path.join(cache_root, 'msfs-2024-utils', 'simbrief_ofp_cache', f"{safe_username}.json")
+
+def load_ofp_cache(username : str) -> dict | None:
+    with ofp_cache_lock:
+        if username in ofp_cache_memory:
+            return ofp_cache_memory[username]
+    try:
+        with open(get_ofp_cache_path(username), "r", encoding="utf8") as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if entry.get("version") != OFP_CACHE_VERSION:
+        return None
+    with ofp_cache_lock:
+        ofp_cache_memory[username] = entry
+    return entry
+
+def save_ofp_cache(username : str, entry : dict, to_disk : bool = True):
+    with ofp_cache_lock:
+        ofp_cache_memory[username] = entry
+    if not to_disk:
+        return
+    cache_path = get_ofp_cache_path(username)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = cache_path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf8") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass # The cache is only an optimization
+
+def get_plan_id(ofp : dict) -> list:
+    params = ofp.get("params", {})
+    return [params.get("request_id"), params.get("time_generated")]
+
+def get_ofp_url(username : str) -> str:
+    return os.getenv(SIMBRIEF_OFP_URL_ENV, SIMBRIEF_OFP_URL).format(username=quote(username))
+
+def release_connection(response, max_drain : int = MAX_DRAIN_SIZE):
+    """
+    Read what's left of a streamed `response`, so its connection goes back to the session's pool when it's closed.
+    If more than `max_drain` bytes are left, give up, and the connection is closed instead.
+    """
+    drained = 0
+    while drained <= max_drain:
+        chunk = response.raw.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        drained += len(chunk)
+
+def fetch_ofp(username : str, ttl : float = DEFAULT_OFP_CACHE_TTL_SECONDS, force : bool = False, session = None, sections : Optional[Iterable[str]] = OFP_SECTIONS, save_unchanged : bool = True) -> tuple[dict, str]:
+    """
+    Returns the latest OFP of `username`, and where it came from: "cached" (within the TTL, not refetched),
+    "unchanged" (revalidated, same plan as cached) or "new" (a plan that wasn't cached).
+    Pass a requests.Session as `session` to reuse its pooled connections across many fetches.
+    Only the OFP's top-level `sections` are parsed (the response is streamed, and parsing stops once they've all
+    arrived), or the whole OFP if `sections` is None. A small remainder is still read so the connection can be reused.
+    """
+    entry = load_ofp_cache(username)
+    now = time.time()
+    if entry and not force and now - entry["fetched_at"] < ttl:
+        return entry["ofp"], "cached"
+
+    if session is None:
+        import requests # pylint: disable=import-outside-toplevel
+        session = requests
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    with session.get(get_ofp_url(username), headers=headers, timeout=10, stream=True) as response:
+        if response.status_code == 304 and entry:
+            release_connection(response)
+            entry["fetched_at"] = now
+            save_ofp_cache(username, entry, save_unchanged)
+            return entry["ofp"], "unchanged"
+        if not response.ok:
+            release_connection(response)
+        response.raise_for_status()
+        if sections is None:
+            ofp = response.json()
+        else:
+            ofp = extract_ofp_sections(response.iter_content(READ_CHUNK_SIZE), sections)
+            release_connection(response)
+
+    status = "unchanged" if entry and get_plan_id(entry["ofp"]) == get_plan_id(ofp) else "new"
+    save_ofp_cache(username, {
+        "version": OFP_CACHE_VERSION,
+        "fetched_at": now,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "ofp": ofp,
+    }, save_unchanged or status == "new")
+    return ofp, status
+
+def load_ofp_file(path : str, sections : Optional[Iterable[str]] = OFP_SECTIONS) -> dict:
+    """ Load an OFP saved from SimBrief's JSON or XML API (only its top-level `sections`, unless that's None). """
+    return load_ofp_sections(path, sections)
+
+def load_ofp_files(paths : list[str], sections : Optional[Iterable[str]] = OFP_SECTIONS) -> list[tuple[str, dict | None, str | None]]:
+    """ Load several OFP files, e.g. as one task for a process pool. Returns (path, ofp, error) for each. """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, load_ofp_file(path, sections), None))
+        except Exception as e: # pylint: disable=broad-except
+            # Exceptions don't all survive pickling back from a worker process, so just pass on the message
+            results.append((path, None, str(e)))
+    return results
@@ -0,0 +1,213 @@
+""" Run the payload maximizer over a whole roster of SimBrief users or saved OFPs at once """
+
+# OFPs are fetched concurrently over one pooled HTTP session (with at most --jobs requests in flight), and each
+# plan's payload is calculated as soon as its OFP arrives, so the calculations never wait on each other's fetches.
+# A username that appears several times (e.g. with different airframes) is only fetched once.
+# Saved OFP files (JSON or XML) are parsed on a process pool instead, in batches of FILES_PER_TASK, so a whole archive
+# of them is spread over every CPU core.
+
+# pylint: disable=line-too-long
+
+import argparse
+import csv
+import json
+import locale
+import multiprocessing
+import os.path
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from airframe_db import AirframeDb, get_airframes_path, load_airframe_db
+from payload_calc import calculate_max_payload
+from simbrief_ofp import DEFAULT_OFP_CACHE_TTL_SECONDS, fetch_ofp, get_plan_id, load_ofp_files
+
+VERSION = "0.1.0"
+
+DEFAULT_JOBS = 8
+FILES_PER_TASK = 32
+OFP_FILE_EXTENSIONS = (".json", ".xml")
+RESULT_FIELDS = ["source", "airframe", "request_id", "origin", "destination", "final_pax", "final_freight", "limiting_weight", "error"]
+
+@dataclass
+class BatchJob:
+    # Either a SimBrief username, or the path of a saved OFP JSON file
+    username : str | None
+    ofp_path : str | None
+    airframe : str
+    desired_pax : int | None = None
+    desired_freight : int | None = None
+
+    @property
+    def source(self) -> str:
+        return self.username if self.username is not None else self.ofp_path
+
+def read_roster(roster_path : str, default_airframe : str) -> list[BatchJob]:
+    """
+    A roster is a CSV file with a header row. Each row needs a "username" or an "ofp" (file path) column, and may set
+    "airframe", "desired_pax" and "desired_freight".
+    """
+    jobs = []
+    roster_dir = os.path.dirname(os.path.abspath(roster_path))
+    with open(roster_path, "r", encoding="utf8", newline="") as f:
+        for row in csv.DictReader(f):
+            ofp_path = row.get("ofp") or None
+            if ofp_path:
+                ofp_path = os.path.join(roster_dir, ofp_path)
+            jobs.append(BatchJob(
+                row.get("username") or None,
+                ofp_path,
+                row.get("airframe") or default_airframe,
+                int(row["desired_pax"]) if row.get("desired_pax") else None,
+                int(row["desired_freight"]) if row.get("desired_freight") else None,
+            ))
+    return jobs
+
+def find_ofp_files(ofp_dir : str, recursive : bool = False) -> list[str]:
+    ofp_paths = []
+    for root, dirs, files in os.walk(ofp_dir):
+        ofp_paths.extend(os.path.join(root, x) for x in files if x.lower().endswith(OFP_FILE_EXTENSIONS))
+        if not recursive:
+            break
+        dirs.sort()
+    return sorted(ofp_paths)
+
+def load_ofps(jobs : list[BatchJob], max_workers : int, cache_ttl : float, refresh : bool, processes : int | None = None):
+    """
+    Fetch or load every job's OFP concurrently. Yields (source, ofp, error) as each one arrives.
+    Files are loaded on a pool of `processes` processes (all cores if None), or on the fetch threads if that's 0.
+    """
+    usernames = list(dict.fromkeys(job.username for job in jobs if job.username is not None))
+    ofp_paths = list(dict.fromkeys(job.ofp_path for job in jobs if job.username is None))
+    use_processes = processes != 0 and len(ofp_paths) > FILES_PER_TASK
+
+    session = None
+    if usernames:
+        import requests # pylint: disable=import-outside-toplevel
+        from requests.adapters import HTTPAdapter # pylint: disable=import-outside-toplevel
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+
+    process_executor = ProcessPoolExecutor(max_workers=processes) if use_processes else None
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for username in usernames:
+                futures[executor.submit(lambda x: [(x, fetch_ofp(x, cache_ttl, refresh, session)[0], None)], username)] = [username]
+            file_executor = process_executor or executor
+            for i in range(0, len(ofp_paths), FILES_PER_TASK):
+                batch = ofp_paths[i:i + FILES_PER_TASK]
+                futures[file_executor.submit(load_ofp_files, batch)] = batch
+            for future in as_completed(futures):
+                try:
+                    yield from future.result()
+                except Exception as e: # pylint: disable=broad-except
+                    for source in futures[future]:
+                        yield source, None, e
+    finally:
+        if process_executor is not None:
+            process_executor.shutdown(cancel_futures=True)
+        if session is not None:
+            session.close()
+
+def run_batch(jobs : list[BatchJob], known_airframes : AirframeDb, max_workers : int = DEFAULT_JOBS, cache_ttl : float = DEFAULT_OFP_CACHE_TTL_SECONDS, refresh : bool = False, custom_max_pax : int | None = None, include_pareto : bool = False, processes : int | None = None) -> list[dict]:
+    """ Returns one result row per job, in the order of `jobs`. The pax vs. freight table is only included on request. """
+    jobs_by_source = {}
+    for index, job in enumerate(jobs):
+        jobs_by_source.setdefault(job.source, []).append(index)
+
+    results : list[dict] = [{}] * len(jobs)
+    for source, ofp, error in load_ofps(jobs, max_workers, cache_ttl, refresh, processes):
+        for index in jobs_by_source[source]:
+            job = jobs[index]
+            result = {"source": source, "airframe": job.airframe}
+            try:
+                if error is not None:
+                    raise error if isinstance(error, Exception) else ValueError(error)
+                result["request_id"] = get_plan_id(ofp)[0]
+                result["origin"] = ofp.get("origin", {}).get("icao_code")
+                result["destination"] = ofp.get("destination", {}).get("icao_code")
+                if job.airframe:
+                    airframe = known_airframes.get(job.airframe)
+                    if airframe is None:
+                        raise ValueError(f"Unknown airframe: {job.airframe}")
+                    max_pax = int(airframe["max_pax"])
+                elif custom_max_pax is not None:
+                    max_pax = custom_max_pax
+                else:
+                    raise ValueError("No airframe or --max_pax given")
+                result.update(calculate_max_payload(ofp, max_pax, job.desired_pax, job.desired_freight))
+                if not include_pareto:
+                    del result["pareto"]
+            except Exception as e: # pylint: disable=broad-except
+                result["error"] = str(e)
+            results[index] = result
+    return results
+
+def write_results(results : list[dict], output_path : str | None, output_format : str):
+    f = open(output_path, "w", encoding="utf8", newline="") if output_path else sys.stdout
+    try:
+        if output_format == "json":
+            json.dump(results, f, indent=4)
+            f.write("\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    finally:
+        if output_path:
+            f.close()
+
+def main():
+    locale.setlocale(locale.LC_ALL, '')
+    parser = argparse.ArgumentParser(description="Run the Simbrief Payload Maximizer over many users or saved OFPs.")
+    parser.add_argument("--usernames", type=str, nargs="*", default=[], help="SimBrief usernames to fetch the latest OFP of")
+    parser.add_argument("--usernames_file", type=str, default=None, help="A file with one SimBrief username per line")
+    parser.add_argument("--ofp_dir", type=str, default=None, help="A directory of saved OFP JSON or XML files")
+    parser.add_argument("--recursive", action="store_true", help="Also look for OFP files in --ofp_dir's subdirectories")
+    parser.add_argument("--processes", type=int, default=None, help="How many processes to parse OFP files on (0 parses them on the fetch threads). Defaults to one per CPU core")
+    parser.add_argument("--roster", type=str, default=None, help="A CSV file with username or ofp, and optionally airframe, desired_pax and desired_freight columns")
+    parser.add_argument("--airframe", type=str, default="", help="The airframe id to use where the roster doesn't give one")
+    parser.add_argument("--max_pax", type=int, default=None, help="The maximum number of passengers, for a custom airframe")
+    parser.add_argument("--desired_pax", type=int, default=None)
+    parser.add_argument("--desired_freight", type=int, default=None)
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="How many OFPs to fetch at once")
+    parser.add_argument("--cache_ttl", type=float, default=DEFAULT_OFP_CACHE_TTL_SECONDS, help="Seconds a cached OFP is used before checking for a new one")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached OFPs")
+    parser.add_argument("--pareto", action="store_true", help="Include the most freight for every number of passengers (JSON output only)")
+    parser.add_argument("--output", type=str, default=None, help="Where to write the results. Defaults to stdout")
+    parser.add_argument("--format", type=str, choices=["csv", "json"], default=None, help="The output format. Defaults to the output file's extension, or csv")
+    args = parser.parse_args()
+
+    if args.desired_pax is not None and args.desired_freight is not None:
+        parser.error("You can't specify both desired_pax and desired_freight")
+
+    usernames = list(args.usernames)
+    if args.usernames_file:
+        with open(args.usernames_file, "r", encoding="utf8") as f:
+            usernames.extend(x.strip() for x in f if x.strip() and not x.startswith("#"))
+    jobs = [BatchJob(x, None, args.airframe, args.desired_pax, args.desired_freight) for x in usernames]
+    if args.ofp_dir:
+        for ofp_path in find_ofp_files(args.ofp_dir, args.recursive):
+            jobs.append(BatchJob(None, ofp_path, args.airframe, args.desired_pax, args.desired_freight))
+    if args.roster:
+        jobs.extend(read_roster(args.roster, args.airframe))
+    if not jobs:
+        parser.error("No usernames, OFP files or roster given")
+
+    known_airframes = AirframeDb({})
+    airframes_path = get_airframes_path()
+    if airframes_path:
+        known_airframes = load_airframe_db(airframes_path)
+
+    output_format = args.format or ("json" if args.output and args.output.lower().endswith(".json") else "csv")
+    results = run_batch(jobs, known_airframes, max(1, args.jobs), args.cache_ttl, args.refresh, args.max_pax, args.pareto, args.processes)
+    write_results(results, args.output, output_format)
+
+    failures = sum(1 for x in results if x.get("error"))
+    print(f"Simbrief Payload Maximizer batch v{VERSION}: {len(results) - failures} of {len(results)} plans calculated", file=sys.stderr)
+
+if __name__ == "__main__":
+    # Needed for the process pool in a bundled exe
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,142 @@
+""" Benchmark the payload maximizer end to end, split into fetch, parse and compute """
+
+# The parse phase parses the whole OFP, as response.json() would. The extract phase pulls out just the sections the
+# calculation reads, as fetch_ofp does, for comparison.
+# Runs entirely offline: the OFP comes from a recorded JSON or XML file (the bundled sanitized sample by default),
+# served by an in-process simbrief_stub_server (with the given latency, jitter and error rate), or read straight from
+# disk with --no_network. After the per-phase timings, the OFP cache is timed in its three states: a cold fetch, a
+# conditional revalidation (304) and a TTL hit (JSON only, as that's what fetch_ofp requests).
+
+# pylint: disable=line-too-long
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from ofp_extract import READ_CHUNK_SIZE, extract_ofp_sections, extract_ofp_sections_xml, is_xml_ofp
+from payload_calc import optimize_payload, payload_inputs_from_ofp
+import simbrief_ofp
+from simbrief_stub_server import SAMPLE_OFP_DIR, StubOptions, get_stub_ofp_url, start_stub_server
+
+BENCH_USERNAME = "bench"
+SAMPLE_OFP_FILE = os.path.join(SAMPLE_OFP_DIR, "default.json")
+
+def summarize(times : list[float]) -> str:
+    if not times:
+        return "no samples"
+    ms = sorted(x * 1000 for x in times)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"min {ms[0]:8.3f}  median {statistics.median(ms):8.3f}  p95 {p95:8.3f}  mean {statistics.fmean(ms):8.3f} ms"
+
+def bench_phases(fetch, max_pax : int, iterations : int, xml : bool = False) -> dict[str, list[float]]:
+    parse, extract = (ET.fromstring, extract_ofp_sections_xml) if xml else (json.loads, extract_ofp_sections)
+    times = {"fetch": [], "parse": [], "extract": [], "compute": [], "total": []}
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            data = fetch()
+        except Exception: # pylint: disable=broad-except
+            errors += 1
+            continue
+        fetched = time.perf_counter()
+        parse(data)
+        parsed = time.perf_counter()
+        ofp = extract(data[i:i + READ_CHUNK_SIZE] for i in range(0, len(data), READ_CHUNK_SIZE))
+        extracted = time.perf_counter()
+        optimize_payload(payload_inputs_from_ofp(ofp), max_pax)
+        computed = time.perf_counter()
+        times["fetch"].append(fetched - start)
+        times["parse"].append(parsed - fetched)
+        times["extract"].append(extracted - parsed)
+        times["compute"].append(computed - extracted)
+        times["total"].append(computed - start - (parsed - fetched))
+    times["errors"] = errors
+    return times
+
+def bench_cache(iterations : int) -> dict[str, list[float]]:
+    """ Time fetch_ofp against the stub, cold (nothing cached, 200), revalidated (TTL 0, 304) and cached (within the TTL). """
+    import requests # pylint: disable=import-outside-toplevel
+    times = {"cold": [], "revalidated": [], "cached": []}
+    with requests.Session() as session:
+        for name, ttl in [("cold", 0), ("revalidated", 0), ("cached", 1e9)]:
+            for _ in range(iterations):
+                # Only the disk cache is under test, so start each fetch without the in-memory copy
+                simbrief_ofp.ofp_cache_memory.clear()
+                if name == "cold":
+                    # Without a cached entry there's no ETag to revalidate, so this is a full fetch and parse
+                    try:
+                        os.remove(simbrief_ofp.get_ofp_cache_path(BENCH_USERNAME))
+                    except FileNotFoundError:
+                        pass
+                start = time.perf_counter()
+                try:
+                    simbrief_ofp.fetch_ofp(BENCH_USERNAME, ttl, session=session)
+                except Exception: # pylint: disable=broad-except
+                    continue
+                times[name].append(time.perf_counter() - start)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Simbrief Payload Maximizer offline.")
+    parser.add_argument("ofp_file", type=str, nargs="?", default=SAMPLE_OFP_FILE, help="A recorded OFP JSON or XML file (default: the bundled sample)")
+    parser.add_argument("--max_pax", type=int, default=180)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--no_network", action="store_true", help="Read the OFP from disk instead of through the stub server")
+    parser.add_argument("--latency", type=float, default=0, help="Stub server latency in milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="Stub server latency jitter in milliseconds")
+    parser.add_argument("--error_rate", type=float, default=0, help="Fraction of stub server requests to fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    xml = is_xml_ofp(args.ofp_file)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(args.ofp_file, "rb") as f:
+            ofp_data = f.read()
+        print(f"OFP: {args.ofp_file} ({len(ofp_data):,} bytes), {args.iterations} iterations")
+
+        if args.no_network:
+            def fetch():
+                with open(args.ofp_file, "rb") as f:
+                    return f.read()
+            results = bench_phases(fetch, args.max_pax, args.iterations, xml)
+            cache_results = {}
+        else:
+            import requests # pylint: disable=import-outside-toplevel
+            with open(os.path.join(temp_dir, f"{BENCH_USERNAME}.{'xml' if xml else 'json'}"), "wb") as f:
+                f.write(ofp_data)
+            server = start_stub_server(StubOptions(temp_dir, args.latency, args.jitter, args.error_rate, seed=args.seed))
+            # Keep the benchmark's OFP cache out of the real one
+            os.environ[simbrief_ofp.SIMBRIEF_OFP_URL_ENV] = get_stub_ofp_url(server)
+            os.environ["LOCALAPPDATA"] = os.path.join(temp_dir, "cache")
+            print(f"Stub server: {args.latency} ms latency, {args.jitter} ms jitter, {args.error_rate:.0%} errors")
+            try:
+                with requests.Session() as session:
+                    url = simbrief_ofp.get_ofp_url(BENCH_USERNAME)
+                    if xml:
+                        url = url.replace("&json=1", "")
+                    def fetch():
+                        response = session.get(url, timeout=10)
+                        response.raise_for_status()
+                        return response.content
+                    results = bench_phases(fetch, args.max_pax, args.iterations, xml)
+                cache_results = {} if xml else bench_cache(args.iterations)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    print("=================================================")
+    # total is fetch + extract + compute, i.e. what fetch_ofp and the calculation take
+    for phase in ["fetch", "parse", "extract", "compute", "total"]:
+        print(f"{phase:<12} {summarize(results[phase])}")
+    if results["errors"]:
+        print(f"{'errors':<12} {results['errors']}")
+    for state, times in cache_results.items():
+        print(f"{'ofp ' + state:<16} {summarize(times)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+""" Local HTTP service for the payload maximizer, for dispatch dashboards and EFB overlays """
+
+# GET  /payload?username=<SimBrief user>&airframe=<id>[&desired_pax=<n>|&desired_freight=<n>][&pareto=1]
+# POST /payload?airframe=<id>... with an OFP's JSON as the body
+# Either max_pax=<n> can be given instead of airframe. The response is the calculation's result as JSON.
+# Results are memoized by the OFP values the calculation reads (its weights and fuel) plus the parameters, so repeated
+# queries for the same plan are answered from memory, while a POSTed OFP with edited weights is calculated afresh. A username's OFP comes through the same TTL cache as the interactive script.
+
+# pylint: disable=line-too-long
+
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, astuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from airframe_db import AirframeDb, get_airframes_path, load_airframe_db
+from payload_calc import optimize_payload, payload_inputs_from_ofp
+from simbrief_ofp import DEFAULT_OFP_CACHE_TTL_SECONDS, fetch_ofp, get_plan_id
+
+VERSION = "0.1.0"
+
+DEFAULT_PORT = 8765
+MAX_MEMOIZED_RESULTS = 1024
+
+class PayloadService:
+    def __init__(self, known_airframes : AirframeDb, cache_ttl : float = DEFAULT_OFP_CACHE_TTL_SECONDS):
+        self.known_airframes = known_airframes
+        self.cache_ttl = cache_ttl
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_max_pax(self, params : dict) -> int:
+        if params.get("max_pax"):
+            return int(params["max_pax"])
+        if not params.get("airframe"):
+            raise ValueError("Either airframe or max_pax is required")
+        airframe = self.known_airframes.get(params["airframe"])
+        if airframe is None:
+            raise ValueError(f"Unknown airframe: {params['airframe']}")
+        return int(airframe["max_pax"])
+
+    def calculate(self, params : dict, ofp : dict | None = None) -> dict:
+        """ The payload for `ofp`, or for the latest OFP of params["username"] if there's no `ofp`. """
+        if ofp is None:
+            if not params.get("username"):
+                raise ValueError("username is required")
+            ofp = fetch_ofp(params["username"], self.cache_ttl)[0]
+        max_pax = self.get_max_pax(params)
+        desired_pax = int(params["desired_pax"]) if params.get("desired_pax") else None
+        desired_freight = int(params["desired_freight"]) if params.get("desired_freight") else None
+
+        request_id, time_generated = get_plan_id(ofp)
+        inputs = payload_inputs_from_ofp(ofp)
+        key = (astuple(inputs), max_pax, desired_pax, desired_freight)
+        with self.lock:
+            solution = self.results.get(key)
+            if solution is not None:
+                self.results.move_to_end(key)
+        if solution is None:
+            solution = optimize_payload(inputs, max_pax, desired_pax, desired_freight)
+            with self.lock:
+                self.results[key] = solution
+                while len(self.results) > MAX_MEMOIZED_RESULTS:
+                    self.results.popitem(last=False)
+
+        result = asdict(solution)
+        if params.get("pareto") not in ["1", "true"]:
+            del result["pareto"]
+        result["request_id"] = request_id
+        result["time_generated"] = time_generated
+        return result
+
+class PayloadRequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive between queries (every response has a Content-Length), and don't let Nagle's algorithm
+    # hold back the body that follows the headers
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    service : PayloadService = None
+    verbose = False
+
+    def send_json(self, status : int, body : dict):
+        data = json.dumps(body).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_payload(self, ofp : dict | None = None):
+        url = urlparse(self.path)
+        if url.path != "/payload":
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            self.send_json(200, self.service.calculate(params, ofp))
+        except (ValueError, KeyError) as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e: # pylint: disable=broad-except
+            self.send_json(500, {"error": str(e)})
+
+    def do_GET(self): # pylint: disable=invalid-name
+        self.handle_payload()
+
+    def do_POST(self): # pylint: disable=invalid-name
+        try:
+            ofp = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except json.JSONDecodeError as e:
+            self.send_json(400, {"error": f"Invalid OFP JSON: {e}"})
+            return
+        self.handle_payload(ofp)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        if self.verbose:
+            super().log_message(format, *args)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Simbrief Payload Maximizer over local HTTP.")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache_ttl", type=float, default=DEFAULT_OFP_CACHE_TTL_SECONDS, help="Seconds a cached OFP is used before checking for a new one")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    known_airframes = AirframeDb({})
+    airframes_path = get_airframes_path()
+    if airframes_path:
+        known_airframes = load_airframe_db(airframes_path)
+
+    PayloadRequestHandler.service = PayloadService(known_airframes, args.cache_ttl)
+    PayloadRequestHandler.verbose = args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), PayloadRequestHandler)
+    print(f"Simbrief Payload Maximizer server v{VERSION}, {len(known_airframes)} known airframes")
+    print(f"Listening on http://{args.host}:{args.port}/payload")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+""" Local stand-in for SimBrief's OFP API, serving recorded OFPs for offline testing and benchmarking """
+
+# Serves GET /api/xml.fetcher.php?username=<user>&json=1 from a directory of recorded OFPs: <user>.json if
+# there is one, else default.json (and without json=1, <user>.xml or default.xml, like SimBrief's XML API). By default
+# that's sample_ofp/, which has a sanitized sample OFP in both formats. Responses carry an ETag (and honor If-None-Match with a 304), so the calculators'
+# conditional revalidation can be exercised too. --latency and --jitter delay every response, and --error_rate makes
+# that fraction of requests fail with --error_status, seeded by --seed so runs are reproducible.
+# Point the calculators at it with the SIMBRIEF_OFP_URL environment variable, e.g.
+#   SIMBRIEF_OFP_URL=http://127.0.0.1:8780/api/xml.fetcher.php?username={username}&json=1
+
+# pylint: disable=line-too-long
+
+import argparse
+import hashlib
+import os.path
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+VERSION = "0.1.0"
+
+DEFAULT_PORT = 8780
+OFP_PATH = "/api/xml.fetcher.php"
+SAMPLE_OFP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_ofp")
+
+class StubOptions:
+    def __init__(self, ofp_dir : str, latency_ms : float = 0, jitter_ms : float = 0, error_rate : float = 0, error_status : int = 503, seed : int | None = None):
+        self.ofp_dir = ofp_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+
+    def next_delay_and_error(self) -> tuple[float, bool]:
+        with self.random_lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    options : StubOptions = None
+    verbose = False
+
+    def send_body(self, status : int, data : bytes, headers : dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self): # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        if url.path != OFP_PATH:
+            self.send_body(404, b"Not found")
+            return
+
+        delay, fail = self.options.next_delay_and_error()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.send_body(self.options.error_status, b"Injected error")
+            return
+
+        query = parse_qs(url.query)
+        username = query.get("username", [""])[-1]
+        extension, content_type = ("json", "application/json") if query.get("json", [""])[-1] == "1" else ("xml", "application/xml")
+        ofp_path = os.path.join(self.options.ofp_dir, f"{os.path.basename(username)}.{extension}")
+        if not username or not os.path.isfile(ofp_path):
+            ofp_path = os.path.join(self.options.ofp_dir, f"default.{extension}")
+        try:
+            with open(ofp_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.send_body(400, b'{"fetch":{"status":"Error: Unknown UserID"}}', {"Content-Type": "application/json"})
+            return
+
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.options.not_modified += 1
+            self.send_body(304, b"", {"ETag": etag})
+            return
+        self.send_body(200, data, {"Content-Type": content_type, "ETag": etag})
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        if self.verbose:
+            super().log_message(format, *args)
+
+def start_stub_server(options : StubOptions, host : str = "127.0.0.1", port : int = 0) -> ThreadingHTTPServer:
+    """ Start the stub on a background thread (port 0 picks a free port). Returns the server, call shutdown() to stop it. """
+    handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"options": options})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def get_stub_ofp_url(server : ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{OFP_PATH}?username={{username}}&json=1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded SimBrief OFPs locally, with configurable latency and errors.")
+    parser.add_argument("ofp_dir", type=str, nargs="?", default=SAMPLE_OFP_DIR, help="Directory of recorded OFPs, as <username>.json/.xml and/or default.json/.xml (default: the bundled sample)")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0, help="Milliseconds to delay every response by")
+    parser.add_argument("--jitter", type=float, default=0, help="Random +/- milliseconds added to the latency")
+    parser.add_argument("--error_rate", type=float, default=0, help="Fraction of requests (0-1) to fail")
+    parser.add_argument("--error_status", type=int, default=503, help="HTTP status of failed requests")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the jitter and errors")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.ofp_dir):
+        parser.error(f"{args.ofp_dir} is not a directory")
+    StubRequestHandler.options = StubOptions(args.ofp_dir, args.latency, args.jitter, args.error_rate, args.error_status, args.seed)
+    StubRequestHandler.verbose = args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), StubRequestHandler)
+    print(f"SimBrief stub server v{VERSION}, serving {args.ofp_dir}")
+    print(f"SIMBRIEF_OFP_URL={get_stub_ofp_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        options = StubRequestHandler.options
+        print(f"{options.requests} requests, {options.errors} injected errors, {options.not_modified} not modified")
+
+if __name__ == "__main__":
+    main()